@@ -30,16 +30,838 @@ References are placed in the docstring of the function which they informed.
 
 import numpy as np  # for np arrays
 import os  # for confirming that files exist
-import csv  # read in CSV files
+import time  # timing of index builds
+import collections  # vertex counts for incremental edits, LRU order of the result cache
+import hashlib  # content hashes for the result cache
+import functools  # timing decorator for PIPStats
+from fractions import Fraction  # exact arithmetic for uncertain orientation tests
+import itertools  # chunked reading of large files
+import multiprocessing  # parallel point in polygon
+try:
+    from multiprocessing import shared_memory  # python 3.8+; parallel mode falls back to serial without it
+except ImportError:
+    shared_memory = None
 import matplotlib.pyplot as plt  # basic plotting
-from matplotlib.patches import Polygon as Pgon  # support for plotting polygon
+from matplotlib.patches import Polygon as Pgon, PathPatch  # support for plotting polygon
+from matplotlib.path import Path  # support for plotting polygons with several rings
 import mpld3  # interactive plotting module
 
+# approximate memory budget (bytes) for the temporary arrays of one vectorized point/edge block
+CHUNK_BYTES = 64 * 2**20
+# bytes of temporaries allocated per (point, edge) pair by the vectorized kernels
+PAIR_BYTES = 48
+# bytes of temporaries allocated per candidate (segment, edge) pair by segmentPairs and segmentIntersections
+SEGMENT_PAIR_BYTES = 192
+# points kept together in one block before the edges of very large polygons are split up as well
+BLOCK_POINTS = 256
+
+# polygons with more edges than this use the slab index for internal exact tests (e.g. grid fallback)
+SLAB_MIN_EDGES = 1024
+# default number of grid cells per polygon edge for CellGrid, and padding of edge cell ranges (in cells)
+GRID_CELLS_PER_EDGE = 4
+GRID_SLACK = 1e-6
+# maximum children per node of the PolygonTree, and points per chunk of a bulk tree query
+TREE_NODE_SIZE = 16
+TREE_QUERY_POINTS = 65536
+# points per chunk when streaming point files through a polygon
+STREAM_CHUNK_POINTS = 2**20
+# rows below which a CSV block that fails to parse in bulk is parsed row by row to find the bad rows
+CSV_MIN_BLOCK = 64
+# binary geometry files (see saveGeometries): identifying bytes, format version, kinds of geometry and the
+# fixed-size header, followed by coordinates [numCoords, numCols] float64, offsets [numGeoms + 1] int64 (first
+# coordinate of each geometry) and ring starts [numRings] int64 (first coordinate of each polygon ring)
+GEOM_MAGIC = b'GISPTGEO'
+GEOM_VERSION = 1
+GEOM_KINDS = ['Point', 'Line', 'Polygon', 'PointCollection']
+GEOM_HEADER = np.dtype({'names': ['magic', 'version', 'kind', 'numGeoms', 'numCoords', 'numCols', 'numRings'],
+                        'formats': ['S8', '<u4', '<u4', '<u8', '<u8', '<u8', '<u8'], 'itemsize': 64})
+# default memory bound (bytes) of the results held by a ResultCache
+CACHE_BYTES = 256 * 2**20
+# fewer points than this are always tested serially, as process pool start-up would dominate
+PARALLEL_MIN_POINTS = 100000
+# tasks per worker when splitting points across a process pool
+PARALLEL_TASKS_PER_WORKER = 4
+# backend selection (see chooseBackend): largest point/edge pair count tested with the scalar reference code,
+# and fewest points per polygon edge for which building a cell grid pays off
+SCALAR_MAX_PAIRS = 64
+GRID_MIN_POINTS_PER_EDGE = 4
+# fewest edges, points and point/edge pairs for which building a slab index beats testing every edge (measured
+# with 'w+' on star polygons, build time included)
+SLAB_MIN_BAND_EDGES = 16
+SLAB_MIN_POINTS = 500
+SLAB_MIN_PAIRS = 2**17
+# relative error bound of the floating point orientation test (Shewchuk's ccwerrboundA, with unit
+# roundoff 2**-53): results smaller than this times the magnitude of the two products are recomputed exactly
+ORIENT_ERROR = (3 + 16 * 2.0**-53) * 2.0**-53
+
+# point classification codes returned by PIP.classify
+OUTSIDE = 0
+INSIDE = 1
+ON_EDGE = 2
+ON_VERTEX = 3
+# line classification codes returned by Polygon.containsLines
+LINE_DISJOINT = 0
+LINE_CROSSING = 1
+LINE_CONTAINED = 2
+
+
+class PIPStats(object):
+    """
+    Opt-in instrumentation of the point in polygon code.  Used as a context manager; while it is active the
+    tests count what they do and time each phase:
+        boxTested / boxRejected - points given to the bounding box test / found outside the box
+        edgesExamined - point/edge pairs evaluated (by the vectorized kernels or the scalar loops)
+        linePoints / vertexPoints - points sent down the boundary path (onLine(s) / onVertex / onVertices)
+        gridLookups / gridExact - points answered by a cell grid lookup / sent on to the exact test
+        exactOrientations - orientation tests too close to call in floating point, redone exactly
+        phases - seconds spent in 'bbox', 'lines', 'vertices', 'winding', 'crossing', 'grid', 'convex',
+                 'distance' and 'index' (building slab indices, cell grids, convex fans and box trees)
+    When no PIPStats is active the only cost is one check of a module variable per call.  Work done in
+    process pool workers is not counted.
+
+    Example:
+        with PIPStats() as stats:
+            polygon.contains(points)
+        print(stats.report())
+    """
+    def __init__(self):
+        """ Initialization function. """
+        self.previous = None
+        self.reset()
+
+    def reset(self):
+        """ Sets all counters and phase times back to zero. """
+        self.boxTested = 0
+        self.boxRejected = 0
+        self.edgesExamined = 0
+        self.linePoints = 0
+        self.vertexPoints = 0
+        self.gridLookups = 0
+        self.gridExact = 0
+        self.exactOrientations = 0
+        self.phases = {}
+        self.running = []
+
+    def __enter__(self):
+        global _stats
+        self.previous, _stats = _stats, self
+        return self
+
+    def __exit__(self, *exc):
+        global _stats
+        _stats, self.previous = self.previous, None
+
+    @property
+    def rejectRate(self):
+        """ Fraction of points rejected by the bounding box test. """
+        return self.boxRejected / float(self.boxTested) if self.boxTested else 0.0
+
+    def start(self, name):
+        """
+        Starts timing the named phase.  Phases nest: time spent in an inner phase is not also counted
+        in the outer one, so the phase times add up to the total.
+
+        :param name: (str) phase name
+        """
+        self.running.append([name, time.time(), 0.0])
+
+    def stop(self):
+        """ Stops timing the innermost running phase and adds its time to phases. """
+        name, start, inner = self.running.pop()
+        elapsed = time.time() - start
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed - inner
+        if self.running:
+            self.running[-1][2] += elapsed
+
+    def report(self):
+        """
+        Summary of the counters and phase times.
+
+        :return: (str) one line per counter and phase.
+        """
+        lines = ["bounding box: {0} tested, {1} rejected ({2:.1%})".format(self.boxTested, self.boxRejected,
+                                                                           self.rejectRate),
+                 "edges examined: {0}".format(self.edgesExamined),
+                 "boundary path: {0} points tested on lines, {1} on vertices".format(self.linePoints,
+                                                                                   self.vertexPoints),
+                 "grid: {0} lookups, {1} exact".format(self.gridLookups, self.gridExact),
+                 "exact orientation tests: {0}".format(self.exactOrientations)]
+        for name, seconds in sorted(self.phases.items()):
+            lines.append("{0}: {1:.6f} s".format(name, seconds))
+        return "\n".join(lines)
+
+
+# active PIPStats, if any
+_stats = None
+
+
+class ResultCache(object):
+    """
+    Opt-in cache of point in polygon results.  While it is enabled (as a context manager, or between enable and
+    disable), PIP.pointInPolygon (and so Polygon.contains and Line.isInside) looks results up by a hash of the
+    polygon coordinates and rings, the point coordinates and the method before testing.  Least recently used
+    results are dropped once the results held take more than maxBytes.  Keys hash content, so replacing the
+    coordinates (coords setter, addPoint, addRing, moveVertex) can never return stale results; entries for
+    the old polygon simply age out.  Counts hits, misses and evictions.
+
+    Example:
+        with ResultCache(maxBytes=2**28) as cache:
+            polygon.contains(points)
+            polygon.contains(points)   # hit
+        print(cache.report())
+    """
+    def __init__(self, maxBytes=CACHE_BYTES):
+        """
+        Initialization function.
+
+        :param maxBytes: (int) largest total size of the cached result arrays
+        """
+        self.maxBytes = maxBytes
+        self.entries = collections.OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.previous = None
+
+    def enable(self):
+        """ Makes this the active cache. """
+        global _cache
+        self.previous, _cache = _cache, self
+
+    def disable(self):
+        """ Restores the cache active before enable (or none). """
+        global _cache
+        _cache, self.previous = self.previous, None
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    def key(self, prepared, pts, method):
+        """
+        Cache key of a query.
+
+        :param prepared: (PreparedPolygon) polygon
+        :param pts: (np.ndarray) coordinates of points [n,2] or [n,3]; only x and y are hashed
+        :param method: (str) method of computing point in polygon
+        :return: (tuple) polygon digest, point digest, number of points, method.
+        """
+        digest = hashlib.blake2b(np.ascontiguousarray(pts[:, :2], dtype=float).tobytes(), digest_size=16)
+        return prepared.digest, digest.digest(), pts.shape[0], method
+
+    def get(self, key):
+        """
+        Cached result for a key, counted as a hit or miss.
+
+        :param key: (tuple) see key
+        :return: (np.ndarray) copy of the cached result, or None.
+        """
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return result.copy()
+
+    def put(self, key, result):
+        """
+        Stores (a copy of) a result, evicting the least recently used results as needed.  Results larger than
+        maxBytes are not stored.
+
+        :param key: (tuple) see key
+        :param result: (np.ndarray) result to store
+        """
+        if result.nbytes > self.maxBytes or key in self.entries:
+            return
+        self.entries[key] = result.copy()
+        self.nbytes += result.nbytes
+        while self.nbytes > self.maxBytes:
+            self.nbytes -= self.entries.popitem(last=False)[1].nbytes
+            self.evictions += 1
+
+    def clear(self):
+        """ Drops every cached result (statistics are kept). """
+        self.entries.clear()
+        self.nbytes = 0
+
+    @property
+    def hitRate(self):
+        """ Fraction of lookups answered from the cache. """
+        lookups = self.hits + self.misses
+        return self.hits / float(lookups) if lookups else 0.0
+
+    def report(self):
+        """
+        Summary of the cache statistics.
+
+        :return: (str) one line per statistic.
+        """
+        return "\n".join(["lookups: {0} hits, {1} misses ({2:.1%} hit)".format(self.hits, self.misses, self.hitRate),
+                          "entries: {0} ({1} bytes of {2}), {3} evicted".format(len(self.entries), self.nbytes,
+                                                                              self.maxBytes, self.evictions)])
+
+
+# active ResultCache, if any
+_cache = None
+
+
+def _timed(name):
+    """
+    Decorator counting the wall time of each call towards the named phase of the active PIPStats.
+    Adds one check of _stats per call when no PIPStats is active.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            stats = _stats
+            if stats is None:
+                return function(*args, **kwargs)
+            stats.start(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.stop()
+        return timed
+    return decorator
+
+
+def pairBlocks(numPts, numEdge, maxBytes=None):
+    """
+    Splits a [points, edges] problem into rectangular blocks whose temporaries fit within maxBytes.
+    Edges are only split when the whole polygon does not fit alongside BLOCK_POINTS points.
+
+    :param numPts: (int) number of points to test
+    :param numEdge: (int) number of polygon edges
+    :param maxBytes: (int) approximate memory budget for one block; default None uses CHUNK_BYTES.
+    :return: (generator) of (slice, slice) tuples indexing points and edges.
+    """
+    if maxBytes is None:
+        maxBytes = CHUNK_BYTES
+    pairs = max(1, maxBytes // PAIR_BYTES)
+    edgeStep = max(1, min(numEdge, pairs // min(max(1, numPts), BLOCK_POINTS)))
+    ptStep = max(1, pairs // edgeStep)
+    for ptStart in range(0, numPts, ptStep):
+        for edgeStart in range(0, numEdge, edgeStep):
+            yield slice(ptStart, ptStart + ptStep), slice(edgeStart, edgeStart + edgeStep)
+
+
+def expandRanges(starts, counts):
+    """
+    Expands ranges given by their starts and lengths into one flat array of values.
+
+    :param starts: (np.ndarray) int first value of each range
+    :param counts: (np.ndarray) int length of each range
+    :return: (tuple of np.ndarray) range number of each value, values.
+    """
+    owner = np.repeat(np.arange(starts.shape[0]), counts)
+    offset = np.arange(owner.shape[0]) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, starts[owner] + offset
+
+
+def countBlocks(counts, budget):
+    """
+    Splits consecutive items into groups whose counts add up to at most budget (or to a single item).
+
+    :param counts: (np.ndarray) int count of each item, e.g. of point/edge pairs
+    :param budget: (int) largest total count of a group
+    :return: (generator) of (int, int) tuples, first and last (exclusive) item of each group.
+    """
+    total = np.cumsum(counts)
+    low = 0
+    while low < total.shape[0]:
+        done = total[low - 1] if low else 0
+        high = max(low + 1, int(np.searchsorted(total, done + budget, side='right')))
+        yield low, high
+        low = high
+
+
+def orientation(x1, y1, x2, y2, px, py):
+    """
+    Robust cross product (x2 - x1)(py - y1) - (px - x1)(y2 - y1), whose sign says whether p is left of (+),
+    right of (-) or on (0) the line from (x1, y1) to (x2, y2).  Computed in floating point; only results
+    too close to zero to trust, given the rounding error bound, are redone in exact rational arithmetic
+    and replaced by their exact sign (+1, -1 or 0).  Broadcasts like numpy arithmetic.
+    Adapted from Shewchuk, Adaptive Precision Floating-Point Arithmetic and Fast Robust Geometric Predicates.
+
+    :param x1, y1: (np.ndarray or float) start of the line
+    :param x2, y2: (np.ndarray or float) end of the line
+    :param px, py: (np.ndarray or float) point to test
+    :return: (np.ndarray) float with the correct sign for each point/line pair.
+    """
+    detLeft = (x2 - x1) * (py - y1)
+    detRight = (px - x1) * (y2 - y1)
+    det = np.asarray(detLeft - detRight)
+    # cheap filter first: one bound for the whole batch from the coordinate ranges...
+    scale = _span(x2, x1) * _span(py, y1) + _span(px, x1) * _span(y2, y1)
+    near = np.abs(det) <= ORIENT_ERROR * scale
+    if not near.any():
+        return det
+    # ...then the bound of each remaining result; a zero bound means both products, so det, are exact
+    near = np.nonzero(near)
+    detLeft, detRight = np.broadcast_to(detLeft, det.shape), np.broadcast_to(detRight, det.shape)
+    bound = ORIENT_ERROR * (np.abs(detLeft[near]) + np.abs(detRight[near]))
+    near = tuple(axis[(np.abs(det[near]) <= bound) & (bound > 0)] for axis in near)
+    if near[0].shape[0]:
+        values = [np.broadcast_to(v, det.shape)[near].tolist() for v in (x1, y1, x2, y2, px, py)]
+        det[near] = [_exactOrientation(*v) for v in zip(*values)]
+        if _stats is not None:
+            _stats.exactOrientations += near[0].shape[0]
+    return det
+
+
+def _span(a, b):
+    """ Upper bound of |a - b| over all broadcast pairs of a and b. """
+    a, b = np.asarray(a), np.asarray(b)
+    return max(a.max() - b.min(), b.max() - a.min())
+
+
+def _exactOrientation(x1, y1, x2, y2, px, py):
+    """ Sign of the orientation cross product in exact rational arithmetic (see orientation). """
+    x1, y1, x2, y2, px, py = [Fraction(v) for v in (x1, y1, x2, y2, px, py)]
+    det = (x2 - x1) * (py - y1) - (px - x1) * (y2 - y1)
+    return (det > 0) - (det < 0)
+
+
+def readPointChunks(filePath, chunkSize=STREAM_CHUNK_POINTS, binary=False, columns=3):
+    """
+    Reads a point file in fixed-size chunks, so that files larger than memory can be processed.
+
+    :param filePath: (str) path to point file.  CSV files have x and y in the first two columns and may start
+                with a text header.  Binary files are raw little-endian float64 values, columns per point.
+    :param chunkSize: (int) number of points per chunk
+    :param binary: (bool) true if the file is binary; default false (CSV).
+    :param columns: (int) number of values per point in a binary file (2 or 3)
+    :return: (generator) of np.ndarray [n,2] or [n,columns] point coordinates, at most chunkSize rows each.
+    """
+    # test if file exists
+    if not os.path.isfile(filePath):
+        raise NameError("File path is not valid. Please enter a correct path to point file.")
+    if binary:
+        if columns not in (2, 3):
+            raise ValueError("Binary point files must have 2 or 3 columns, not {0}.".format(columns))
+        # a truncated file (or the wrong number of columns) would otherwise only fail at the last chunk
+        size = os.path.getsize(filePath)
+        if size % (8 * columns):
+            raise ValueError("Binary point file {0} is {1} bytes, not a whole number of {2}-column float64 "
+                             "points; check columns, or whether the file is truncated.".format(filePath, size,
+                                                                                              columns))
+        with open(filePath, 'rb') as pointFile:
+            while True:
+                chunk = np.fromfile(pointFile, dtype='<f8', count=chunkSize * columns)
+                if chunk.shape[0] == 0:
+                    break
+                yield chunk.reshape(-1, columns)
+        return
+    for chunk in readCSVChunks(filePath, chunkSize=chunkSize):
+        yield chunk
+
+
+def _isNumber(text):
+    """
+    Whether a CSV field holds a number.
+
+    :param text: (str) field
+    :return: (bool) true if it can be read as a float.
+    """
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def _parseRows(rows, firstLine, delimiter, usecols, rejected):
+    """
+    Parses CSV rows in one vectorized pass (np.loadtxt).  If that fails the rows are split in half and each
+    half parsed again, down to CSV_MIN_BLOCK rows which are parsed one at a time, so a few bad rows in a large
+    block cost a few extra passes rather than a slow row by row parse of the whole block.
+
+    :param rows: (list of str) lines of the file
+    :param firstLine: (int) line number (from 1) of the first row
+    :param delimiter: (str) field delimiter
+    :param usecols: (tuple of int) columns to read
+    :param rejected: (list) line numbers of rows that could not be read are appended to it
+    :return: (np.ndarray) [n,len(usecols)] values of the rows read.
+    """
+    if len(rows) > CSV_MIN_BLOCK:
+        try:
+            return np.loadtxt(rows, delimiter=delimiter, usecols=usecols, ndmin=2, comments=None)
+        except ValueError:
+            # quoted fields ("1","2"): drop the quotes and try again
+            if any('"' in row for row in rows):
+                return _parseRows([row.replace('"', '') for row in rows], firstLine, delimiter, usecols, rejected)
+            half = len(rows) // 2
+            return np.vstack([_parseRows(rows[:half], firstLine, delimiter, usecols, rejected),
+                              _parseRows(rows[half:], firstLine + half, delimiter, usecols, rejected)])
+    values = []
+    for i, row in enumerate(rows):
+        if not row.strip():
+            continue
+        fields = row.replace('"', '').split(delimiter)
+        try:
+            values.append([float(fields[c]) for c in usecols])
+        except (ValueError, IndexError):
+            rejected.append(firstLine + i)
+    return np.array(values, dtype=float).reshape(-1, len(usecols))
+
+
+def readCSVChunks(filePath, chunkSize=STREAM_CHUNK_POINTS, delimiter=',', header=None, z=None, rejected=None):
+    """
+    Reads a CSV point file in chunks, each parsed in one vectorized pass (see _parseRows).  Values may be signed,
+    decimal or in exponent notation, and quoted ("1.5"), though quoted fields may not contain the delimiter;
+    blank lines are skipped; rows that cannot be read are left out and reported.
+
+    :param filePath: (str) path to CSV file with x and y in the first two columns
+    :param chunkSize: (int) number of rows per chunk
+    :param delimiter: (str) field delimiter; default ','.
+    :param header: (bool) true if the first line is a header, false if not; default None skips the first line
+                if neither its x nor its y field is a number.  A first line with only one of them a number is
+                taken as a bad data row, and reported.
+    :param z: (int) column of z values; default None reads x and y only.
+    :param rejected: (list) if given, line numbers (from 1) of rows that could not be read are appended to it
+    :return: (generator) of np.ndarray [n,2] (or [n,3] with z) point coordinates.
+    """
+    if not os.path.isfile(filePath):
+        raise NameError("File path is not valid. Please enter a correct path to CSV.")
+    usecols = (0, 1) if z is None else (0, 1, z)
+    rejected = [] if rejected is None else rejected
+    with open(filePath, 'r') as csvFile:
+        first = csvFile.readline()
+        if header is None:
+            fields = first.replace('"', '').split(delimiter)[:2]
+            header = bool(first.strip()) and not any(_isNumber(field) for field in fields)
+        lines = csvFile if header else itertools.chain([first], csvFile)
+        lineNumber = 2 if header else 1
+        while True:
+            rows = list(itertools.islice(lines, chunkSize))
+            if not rows:
+                break
+            yield _parseRows(rows, lineNumber, delimiter, usecols, rejected)
+            lineNumber += len(rows)
+
+
+def loadCSV(filePath, delimiter=',', header=None, z=None, chunkSize=STREAM_CHUNK_POINTS):
+    """
+    Reads a whole CSV point file, see readCSVChunks.
+
+    :param filePath: (str) path to CSV file with x and y in the first two columns
+    :param delimiter: (str) field delimiter; default ','.
+    :param header: (bool) true if the first line is a header; default None detects it.
+    :param z: (int) column of z values; default None (z is NaN).
+    :param chunkSize: (int) number of rows parsed at once
+    :return: (tuple) (np.ndarray) [n,3] coordinates, (np.ndarray) line numbers of rows that could not be read.
+    """
+    rejected = []
+    chunks = list(readCSVChunks(filePath, chunkSize=chunkSize, delimiter=delimiter, header=header, z=z,
+                                rejected=rejected))
+    coords = np.vstack(chunks) if chunks else np.empty([0, 2 if z is None else 3])
+    if z is None:
+        coords = np.column_stack([coords, np.full(coords.shape[0], np.nan)])
+    return coords, np.array(rejected, dtype=int)
+
+
+def saveGeometries(filePath, geoms):
+    """
+    Saves geometries of one kind (Points, Lines, Polygons or PointCollections) to a binary file that
+    loadGeometries can memory-map.  Coordinates are written one geometry at a time, and geometries with only x
+    and y are padded with NaN z if others have z.
+
+    :param filePath: (str) path of the file to write
+    :param geoms: (list of Geom) geometries, all of the same class
+    """
+    kinds = set(type(geom).__name__ for geom in geoms)
+    if len(kinds) != 1 or not kinds <= set(GEOM_KINDS):
+        raise ValueError("Geometries must all be Points, Lines, Polygons or PointCollections.")
+    kind = GEOM_KINDS.index(kinds.pop())
+    if any(geom.coords is None for geom in geoms):
+        raise ValueError("Geometries must have coordinates.")
+    numCols = max(geom.coords.shape[1] for geom in geoms)
+    sizes = np.array([geom.coords.shape[0] for geom in geoms], dtype='<i8')
+    offsets = np.append(0, np.cumsum(sizes)).astype('<i8')
+    rings = np.concatenate([geom.rings + offset for geom, offset in zip(geoms, offsets)] if kind == 2 else
+                           [np.empty(0)]).astype('<i8')
+
+    header = np.zeros(1, dtype=GEOM_HEADER)
+    header[0] = (GEOM_MAGIC, GEOM_VERSION, kind, len(geoms), offsets[-1], numCols, rings.shape[0])
+    with open(filePath, 'wb') as geomFile:
+        header.tofile(geomFile)
+        for geom in geoms:
+            coords = np.full((geom.coords.shape[0], numCols), np.nan, dtype='<f8')
+            coords[:, :geom.coords.shape[1]] = geom.coords
+            coords.tofile(geomFile)
+        offsets.tofile(geomFile)
+        rings.tofile(geomFile)
+
+
+def loadGeometries(filePath, mode='r'):
+    """
+    Opens a binary geometry file written by saveGeometries.  The coordinates are memory-mapped rather than
+    read, so opening is immediate whatever the size of the file and only the parts used are read from disk;
+    each geometry's coordinates are a view of the map (Points are Point views, see Point.view).
+
+    :param filePath: (str) path of the file
+    :param mode: (str) np.memmap mode: 'r' (DEFAULT) read only, 'r+' to write changes back, 'c' copy on write.
+                Adding points to a loaded Line or Polygon copies its coordinates first, as does moving one in mode 'r'.
+    :return: (list of Geom) geometries, in the order saved.
+    """
+    if not os.path.isfile(filePath):
+        raise NameError("File path is not valid. Please enter a correct path to geometry file.")
+    header = np.fromfile(filePath, dtype=GEOM_HEADER, count=1)
+    if header.shape[0] == 0 or header['magic'][0] != GEOM_MAGIC or header['version'][0] != GEOM_VERSION:
+        raise ValueError("Not a geometry file (or a different version): {0}".format(filePath))
+    kind = GEOM_KINDS[header['kind'][0]]
+    numGeoms, numCoords, numCols, numRings = [int(header[name][0]) for name in
+                                              ('numGeoms', 'numCoords', 'numCols', 'numRings')]
+    start = GEOM_HEADER.itemsize
+    # np.memmap cannot map zero bytes
+    coords = (np.memmap(filePath, dtype='<f8', mode=mode, offset=start, shape=(numCoords, numCols))
+              if numCoords else np.empty((0, numCols)))
+    start += numCoords * numCols * 8
+    offsets = np.fromfile(filePath, dtype='<i8', count=numGeoms + 1, offset=start)
+    rings = np.fromfile(filePath, dtype='<i8', count=numRings, offset=start + (numGeoms + 1) * 8)
+
+    if kind == 'Point':
+        return [Point.view(coords, i) for i in offsets[:-1]]
+    if kind == 'PointCollection':
+        return [PointCollection(coords[low:high]) for low, high in zip(offsets[:-1], offsets[1:])]
+    if kind == 'Line':
+        return [Line.view(coords[low:high]) for low, high in zip(offsets[:-1], offsets[1:])]
+    ringSplits = np.searchsorted(rings, offsets)
+    return [Polygon.view(coords[low:high], rings[ringSplits[k]:ringSplits[k + 1]] - low)
+            for k, (low, high) in enumerate(zip(offsets[:-1], offsets[1:]))]
+
+
+# state of a process pool worker: shared memory blocks, the arrays viewing them and the polygon built from them
+_worker = {}
+
+
+def _initWorker(names, numPts, numVerts, rings, method, index, maxBytes):
+    """
+    Process pool initializer: attaches to the shared point, polygon and result buffers and prepares the polygon
+    once per worker.
+    """
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    _worker['blocks'] = blocks
+    _worker['pts'] = np.ndarray((numPts, 2), dtype=float, buffer=blocks[0].buf)
+    _worker['prepared'] = PreparedPolygon(np.ndarray((numVerts, 2), dtype=float, buffer=blocks[1].buf), rings,
+                                          maxBytes)
+    _worker['out'] = np.ndarray((numPts,), dtype=bool, buffer=blocks[2].buf)
+    _worker['method'] = method
+    _worker['index'] = index
+
+
+def _runTask(bounds):
+    """
+    Process pool task: tests one slice of the shared points and writes the results into the shared output.
+    """
+    start, stop = bounds
+    _worker['out'][start:stop] = _worker['prepared'].pointInPolygon(_worker['pts'][start:stop], _worker['method'],
+                                                                    index=_worker['index'])
+
+
+class PointPool(object):
+    """
+    Process pool testing batches of points against one polygon.  Points, polygon and results live in shared
+    memory, so nothing but slice bounds is pickled per task, and results come back in input order.  The
+    workers prepare the polygon (and build its index) once, so a pool can test any number of batches, e.g.
+    the chunks of a stream (see Polygon.streamContains).  Used as a context manager, or closed with close.
+
+    Starts processes: scripts using it must guard their entry point with if __name__ == '__main__' on
+    platforms that spawn workers (Windows, macOS).
+    """
+
+    def __init__(self, prepared, maxPoints, method='w+', index=None, workers=None):
+        """
+        :param prepared: (PreparedPolygon) polygon to test against
+        :param maxPoints: (int) largest batch to be tested; larger batches are split up.
+        :param method: (str) method of computing point in polygon, see PIP.pointInPolygon.
+        :param index: (str) edge index to use, see PIP.pointInPolygon.  Built separately by each worker.
+        :param workers: (int) number of processes; default number of CPUs.
+        """
+        self.workers = multiprocessing.cpu_count() if workers is None else workers
+        self.maxPoints = maxPoints = max(1, maxPoints)
+        numVerts = prepared.numEdge
+        self.blocks = [shared_memory.SharedMemory(create=True, size=max(1, size))
+                       for size in (maxPoints * 2 * 8, numVerts * 2 * 8, maxPoints)]
+        self.pool = None
+        try:
+            self.views = [np.ndarray((maxPoints, 2), dtype=float, buffer=self.blocks[0].buf),
+                          np.ndarray((maxPoints,), dtype=bool, buffer=self.blocks[2].buf)]
+            np.ndarray((numVerts, 2), dtype=float, buffer=self.blocks[1].buf)[:] = prepared.coords[:, :2]
+            self.pool = multiprocessing.Pool(self.workers, _initWorker,
+                                             ([block.name for block in self.blocks], maxPoints, numVerts,
+                                              prepared.rings, method, index, prepared.maxBytes))
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def pointInPolygon(self, pts):
+        """
+        Point in polygon test of a batch of points across the pool.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]
+        :return: (np.ndarray) of bool, true is inside, false is outside.
+        """
+        numPts = pts.shape[0]
+        inside = np.empty(numPts, dtype=bool)
+        for first in range(0, numPts, self.maxPoints):
+            size = min(self.maxPoints, numPts - first)
+            self.views[0][:size] = pts[first:first + size, :2]
+            # several tasks per worker so that uneven slices still balance out
+            step = -(-size // (self.workers * PARALLEL_TASKS_PER_WORKER))
+            self.pool.map(_runTask, [(start, min(start + step, size)) for start in range(0, size, step)])
+            inside[first:first + size] = self.views[1][:size]
+        return inside
+
+    def close(self):
+        """
+        Stops the workers and frees the shared memory.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        # views must be released before the shared memory can be closed
+        self.views = None
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def parallelPointInPolygon(prepared, pts, method='w+', index=None, workers=None):
+    """
+    Point in polygon test with the points partitioned across a process pool (see PointPool).  Falls back to a
+    serial test for fewer than PARALLEL_MIN_POINTS points, a single worker, or if shared memory is not available.
+
+    :param prepared: (PreparedPolygon) polygon to test against
+    :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]
+    :param method: (str) method of computing point in polygon, see PIP.pointInPolygon.
+    :param index: (str) edge index to use, see PIP.pointInPolygon.  Built separately by each worker.
+    :param workers: (int) number of processes; default number of CPUs.
+    :return: (np.ndarray) of bool, true is inside, false is outside.
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    numPts = pts.shape[0]
+    if shared_memory is None or workers <= 1 or numPts < PARALLEL_MIN_POINTS:
+        return prepared.pointInPolygon(pts, method, index=index)
+    with PointPool(prepared, numPts, method, index, workers) as pool:
+        return pool.pointInPolygon(pts)
+
+
+def _scalarBackend(prepared, pts, method):
+    return PIP(pts, prepared).scalarPointInPolygon(method=method)
+
+
+def _vectorizedBackend(prepared, pts, method):
+    return prepared.pointInPolygon(pts, method)
+
+
+def _slabBackend(prepared, pts, method):
+    return prepared.pointInPolygon(pts, method, index='slab')
+
+
+def _gridBackend(prepared, pts, method):
+    return prepared.pointInPolygon(pts, method, index='grid')
+
+
+def _convexBackend(prepared, pts, method):
+    return prepared.pointInPolygon(pts, method, index='convex')
+
+
+def _parallelBackend(prepared, pts, method):
+    return parallelPointInPolygon(prepared, pts, method, index=prepared.fallbackIndex())
+
+
+# point in polygon backends by name: functions of (PreparedPolygon, points [n,2] or [n,3], method) returning
+# an np.ndarray of bool.  All give the same results; they differ only in how the work is done.
+BACKENDS = {'scalar': _scalarBackend,
+            'vectorized': _vectorizedBackend,
+            'slab': _slabBackend,
+            'grid': _gridBackend,
+            'convex': _convexBackend,
+            'parallel': _parallelBackend}
+
+
+def registerBackend(name, function):
+    """
+    Adds (or replaces) a point in polygon backend, which can then be pinned by name or picked by chooseBackend.
+
+    :param name: (str) backend name
+    :param function: (function) of (PreparedPolygon, np.ndarray points, str method) returning np.ndarray of bool.
+    """
+    if not callable(function):
+        raise ValueError("Backend '{0}' must be callable.".format(name))
+    BACKENDS[name] = function
+
+
+def chooseBackend(prepared, numPts):
+    """
+    Picks the point in polygon backend for a workload from the number of points, the number of polygon edges
+    and whether the polygon is convex:
+        'scalar' - a handful of point/edge pairs, where array set-up would cost more than the test itself
+        'grid' - large polygons with enough points per edge to pay for building the grid
+        'convex' - other convex polygons, O(log n) per point
+        'slab' - at least SLAB_MIN_BAND_EDGES edges, SLAB_MIN_POINTS points and SLAB_MIN_PAIRS point/edge pairs
+        'vectorized' - everything else
+    'parallel' is never picked, as it starts processes: it must be asked for with workers or backend.
+
+    :param prepared: (PreparedPolygon) polygon to be tested against
+    :param numPts: (int) number of points to be tested
+    :return: (str) name of a backend in BACKENDS.
+    """
+    numEdge = prepared.numEdge
+    if numPts * numEdge <= SCALAR_MAX_PAIRS:
+        return 'scalar'
+    # an index that has already been built is always worth using
+    manyPoints = numPts >= GRID_MIN_POINTS_PER_EDGE * numEdge
+    if prepared.grid is not None or (manyPoints and numEdge > SLAB_MIN_EDGES):
+        return 'grid'
+    if prepared.convex:
+        return 'convex'
+    if prepared.slab is not None or numEdge > SLAB_MIN_EDGES:
+        return 'slab'
+    if numEdge >= SLAB_MIN_BAND_EDGES and numPts >= SLAB_MIN_POINTS and numPts * numEdge >= SLAB_MIN_PAIRS:
+        return 'slab'
+    return 'vectorized'
+
+
+def runBackend(prepared, pts, method='w+', backend=None):
+    """
+    Point in polygon test of a batch of points with the named backend, or the one chosen by chooseBackend.
+
+    :param prepared: (PreparedPolygon) polygon to test against
+    :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]
+    :param method: (str) method of computing point in polygon, see PIP.pointInPolygon.
+    :param backend: (str) name of a backend in BACKENDS; default None chooses one for the workload.
+    :return: (np.ndarray) of bool, true is inside, false is outside.
+    """
+    if backend is None:
+        backend = chooseBackend(prepared, pts.shape[0])
+    if backend not in BACKENDS:
+        raise ValueError("Unknown backend '{0}'; use one of {1}.".format(backend, sorted(BACKENDS)))
+    return np.asarray(BACKENDS[backend](prepared, pts, method), dtype=bool)
+
 
 class Geom(object):    # Geometry class
     """
     Base class for creating geometry; provided in assignment.
     """
+    # no per-instance dict for subclasses that declare __slots__ (Point)
+    __slots__ = ()
+
     def getStartPoint(self):
         return self.coords[0]
 
@@ -52,209 +874,1710 @@ class Geom(object):    # Geometry class
     def addPoint(self, point):
         self.coords = np.vstack([self.coords, point])
 
+    def save(self, filePath):
+        """
+        Saves the geometry to a binary file (see saveGeometries).
+
+        :param filePath: (str) path of the file to write
+        """
+        saveGeometries(filePath, [self])
+
+    @staticmethod
+    def load(filePath, mode='r'):
+        """
+        Loads a geometry saved with save, memory-mapped (see loadGeometries).
+
+        :param filePath: (str) path of the file
+        :param mode: (str) np.memmap mode, see loadGeometries.
+        :return: (Geom) the (first) geometry in the file.
+        """
+        return loadGeometries(filePath, mode)[0]
+
     def getBoundingBox(self):
         """
-        Function to return the coordinates of a bounding box for any geometry
+        Function to return the coordinates of a bounding box for any geometry
+
+        :return: np array [2,4] containing coordinates of bounding box.
+        """
+        # use min/max to get coordinates for each corner
+        xmin, ymin = self.coords[:, :2].min(axis=0)
+        xmax, ymax = self.coords[:, :2].max(axis=0)
+        corner1 = np.array([xmin, ymin])
+        corner2 = np.array([xmax, ymin])
+        corner3 = np.array([xmax, ymax])
+        corner4 = np.array([xmin, ymax])
+        # create list of points (can be used to create polygon elsewhere
+        bbox = np.vstack([corner1, corner2, corner3, corner4])
+        # return list of points
+        return(bbox)
+
+    def isInside(self, polygon, plot=False, method='w+', save=False, index=None, workers=None, backend=None):
+        """
+        Function to determine if object is inside a given polygon.
+
+        :param polygon: (Polygon) contains vertices of polygon
+        :param plot: (Bool) true to enable plotting; default false.
+                        Must be true to enable saving.
+        :param method: (str) method of computing point in polygon.  Valid inputs:
+                        'ol' - points on lines only
+                        'ov' - points on vertices only
+                        'lv' - points on lines or vertices
+                        'w' - winding number algorithm
+                        'w+' - winding number PLUS any points on lines/vertices (DEFAULT)
+                        'rc' - ray casting algorithm
+                        'rc+' - ray casting algorithm PLUS any points on lines/vertices
+        :param save: (bool) true to enable saving; default false.
+                        True saves image in code location folder as "PIP_visualization_{methodname}.html".
+        :param index: (str) edge index to use: 'slab' (see SlabIndex), 'grid' (see CellGrid) or, for convex
+                        polygons, 'convex' (see ConvexFan); default None chooses a backend for the workload
+                        (see chooseBackend).
+        :param workers: (int) number of processes to spread the points over; default None (serial).
+                        Small inputs are always tested serially.  Processes are only started if workers (or
+                        backend 'parallel') is given; scripts that do so must guard their entry point with
+                        if __name__ == '__main__' on platforms that spawn workers (Windows, macOS).
+        :param backend: (str) name of the backend to use (see BACKENDS); default None chooses a serial one for
+                        the workload.
+
+        :return: if plot = False, returns (np.ndarray) of bool for each point indicating in/out.
+        """
+        # ERROR CHECKING: ensure correct formatting
+        if isinstance(polygon, Polygon):
+            # create PIP instance (?)
+            pip = PIP(self.coords, polygon.prepare())
+
+            # plot, if desired, or return
+            if plot:
+                pip.viewPIP(method=method, save=save)
+            else:
+                return pip.pointInPolygon(method=method, index=index, workers=workers, backend=backend)
+        else:
+            return "Must supply a Polygon object."
+
+    def fromCSV(self, filePath, delimiter=',', header=None, z=None):
+        """
+        Allows geometry to be read in from CSV file, given path (see loadCSV).  Contains moderate error checking.
+        Not implemented/valid for points.
+
+        :param filePath: (str) path to CSV file containing geometry information.
+                First column contains x coord, second column contains y coord.  Text headers ignored.
+        :param delimiter: (str) field delimiter; default ','.
+        :param header: (bool) true if the first line is a header; default None detects it.
+        :param z: (int) column of z values; default None (z is NaN).
+        :return: If successful, (np.ndarray) line numbers of rows that could not be read (empty if none); sets
+                geometry coordinates.  If unsuccessful, error message.
+        """
+        vertices, rejected = loadCSV(filePath, delimiter=delimiter, header=header, z=z)
+        # ensure resultant set isn't empty
+        if vertices.shape[0] > 0:
+            self.coords = vertices
+            return rejected
+        else:
+            return "File must contain coordinates."
+
+
+class Point(Geom):    # Point class
+    """
+    Point class; provided in assignment.  Uses __slots__ and holds either plain floats or, through view, one row
+    of a shared coordinate array (e.g. of a PointCollection), so no array is allocated per point.
+    """
+    __slots__ = ('_x', '_y', '_z', '_buffer', '_row')
+
+    def __init__(self, x=0, y=0, z=float('nan'), filepath=None):
+        self._x, self._y, self._z = float(x), float(y), float(z)
+        self._buffer = None
+        self._row = 0
+    @property
+    def x(self):
+        return self._x if self._buffer is None else self._buffer[self._row, 0]
+    @property
+    def y(self):
+        return self._y if self._buffer is None else self._buffer[self._row, 1]
+    @property
+    def z(self):
+        if self._buffer is None:
+            return self._z
+        # views of [n,2] arrays have no z
+        return self._buffer[self._row, 2] if self._buffer.shape[1] > 2 else float('nan')
+    @x.setter
+    def x(self, x):
+        if self._buffer is None:
+            self._x = float(x)
+        else:
+            self._buffer[self._row, 0] = x
+    @y.setter   
+    def y(self, y):
+        if self._buffer is None:
+            self._y = float(y)
+        else:
+            self._buffer[self._row, 1] = y
+    @z.setter
+    def z(self, z):
+        if self._buffer is None:
+            self._z = float(z)
+        elif self._buffer.shape[1] > 2:
+            self._buffer[self._row, 2] = z
+        else:
+            raise ValueError("Cannot set z of a point viewing [n,2] coordinates.")
+    @property
+    def coords(self):
+        # a view of the row, so writes go through; a plain point is moved into its own [1,3] array on first use
+        if self._buffer is None:
+            self._buffer, self._row = np.array([[self._x, self._y, self._z]]), 0
+        return self._buffer[self._row:self._row + 1]
+    def addPoint(self, point):
+        return "Can't add a point to a point"
+
+    @classmethod
+    def view(cls, coords, i):
+        """
+        Point sharing its coordinates with row i of a larger array (see PointCollection): changes made
+        through either are seen by both.
+
+        :param coords: (np.ndarray) coordinates [n,2] or [n,3]
+        :param i: (int) row of the point
+        :return: (Point) point.
+        """
+        point = cls.__new__(cls)
+        point._buffer, point._row = coords, i
+        return point
+
+    def fromCSV(self, filePath):
+        """Overwritten from Geom; single point cannot be read in as csv.  Read in as Line instead."""
+        return "Cannot import point from CSV.  Import as Line instead."
+
+
+class PointCollection(Geom):    # PointCollection class
+    """
+    Many points held as one contiguous [n,2] or [n,3] float array, rather than as one Point (and one small
+    array) each.  Accepted directly by Polygon.contains, isInside and PIP.  Indexing with an int gives a
+    Point that is a view of that row; indexing with a slice, mask or index array gives a PointCollection.
+    """
+    def __init__(self, points=None, x=None, y=None, z=None):
+        """
+        Initialization function.
+
+        :param points: (np.ndarray or list of Points) coordinates [n,2] or [n,3], or Points to gather; default
+                        None (or an empty list) for no points, unless x and y are given
+        :param x: (np.ndarray) x coordinates, if points is not given
+        :param y: (np.ndarray) y coordinates, if points is not given
+        :param z: (np.ndarray) z coordinates, if points is not given; default none ([n,2] coordinates)
+        """
+        # no points (None or an empty list) gives an empty collection
+        if points is None or (isinstance(points, list) and not points):
+            points = np.column_stack([x, y] if z is None else [x, y, z]) if x is not None else np.empty([0, 3])
+        elif isinstance(points, list) and points and all(isinstance(p, Point) for p in points):
+            points = np.array([(p.x, p.y, p.z) for p in points], dtype=float)
+        self.coords = points
+
+    @property
+    def coords(self):
+        return self.__coords
+
+    @coords.setter
+    def coords(self, points):
+        points = np.ascontiguousarray(points, dtype=float)
+        if points.ndim != 2 or points.shape[1] not in (2, 3):
+            raise ValueError("Points must be an [n,2] or [n,3] array.")
+        self.__coords = points
+
+    @property
+    def x(self):
+        return self.__coords[:, 0]
+
+    @property
+    def y(self):
+        return self.__coords[:, 1]
+
+    @property
+    def z(self):
+        return self.__coords[:, 2] if self.__coords.shape[1] > 2 else np.full(self.__coords.shape[0], np.nan)
+
+    def __len__(self):
+        return self.__coords.shape[0]
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            i = range(len(self))[item]
+            return Point.view(self.__coords, i)
+        return PointCollection(self.__coords[item])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield Point.view(self.__coords, i)
+
+
+class Line(Geom):   # Line class
+    """
+    Line class; provided in assignment.  Coordinates are held in a buffer with spare rows that doubles in size
+    whenever it fills, so adding points one at a time (addPoint) or in bulk (extend) takes amortized constant
+    time per point; coords is a view of the filled rows, replaced by a new view whenever points are added.
+    """
+    def __init__(self, points=None):
+        self.__buffer = None
+        if points is None:
+            self.__coords = None
+        # can initiate directly from CSV here
+        elif isinstance(points, str):
+            self.fromCSV(points)
+        else:
+            self.__coords = np.vstack(points)
+            self.__buffer = self.__coords
+
+    @property
+    def coords(self):
+        return self.__coords
+
+    @coords.setter
+    def coords(self, points):
+        self.__coords = np.vstack(points)
+        self.__buffer = self.__coords
+
+    @classmethod
+    def view(cls, coords):
+        """
+        Line using an existing coordinate array (e.g. memory-mapped, see loadGeometries) without copying it.
+        Adding points (or moving one of a read only array) copies the coordinates first.
+
+        :param coords: (np.ndarray) coordinates [n,2] or [n,3]
+        :return: (Line) line.
+        """
+        line = cls()
+        line.__coords = line.__buffer = coords
+        return line
+
+    def addPoint(self, point):
+        self.extend(point)
+
+    def extend(self, points):
+        """
+        Appends points to the end of the line, growing the coordinate buffer (at least doubling it) only if
+        they do not fit.
+
+        :param points: (np.ndarray) coordinates of one point, or of several points [n, columns of coords]
+        """
+        points = np.atleast_2d(points)
+        if self.__coords is None:
+            self.coords = points
+            return
+        if points.shape[1] != self.__coords.shape[1]:
+            raise ValueError("Points must have {0} coordinates.".format(self.__coords.shape[1]))
+        numPts = self.__coords.shape[0]
+        needed = numPts + points.shape[0]
+        # grow (or widen the type, e.g. int coordinates given float points) by copying into a new buffer
+        dtype = np.result_type(self.__buffer, points)
+        if needed > self.__buffer.shape[0] or dtype != self.__buffer.dtype:
+            buffer = np.empty((max(needed, 2 * self.__buffer.shape[0]), points.shape[1]), dtype=dtype)
+            buffer[:numPts] = self.__coords
+            self.__buffer = buffer
+        self.__buffer[numPts:needed] = points
+        self.__coords = self.__buffer[:needed]
+
+    def setPoint(self, i, point):
+        """
+        Replaces the coordinates of one point.  As in extend, the coordinates are first copied into a new buffer
+        if the type must widen (e.g. int coordinates given a float point), or if the buffer is read only (e.g. a
+        memory map opened with mode 'r').
+
+        :param i: (int) index of the point
+        :param point: (np.ndarray) new coordinates of the point
+        """
+        point = np.asarray(point).ravel()[:self.__coords.shape[1]]
+        dtype = np.result_type(self.__buffer, point)
+        if dtype != self.__buffer.dtype or not self.__buffer.flags.writeable:
+            self.__buffer = np.array(self.__buffer, dtype=dtype)
+            self.__coords = self.__buffer[:self.__coords.shape[0]]
+        self.__coords[i] = point
+
+
+class Polygon(Line, Geom):  # Polygon class
+    """
+    Polygon class; provided in assessment.  Extended to hold several rings (holes and/or separate parts) in one
+    coordinate array: rings holds the index of the first vertex of each ring, and each ring is assumed to close.
+    """
+    def __init__(self, points=None, rings=None):
+        """
+        Initialization function.
+
+        :param points: (list of np.ndarray, np.ndarray or str) vertex coordinates, or path to CSV, as for Line.
+        :param rings: (list of int) index of the first vertex of each ring; default one ring starting at 0.
+        """
+        Line.__init__(self, points)
+        self.rings = rings
+
+    @classmethod
+    def view(cls, coords, rings=None):
+        """
+        Polygon using an existing coordinate array without copying it, see Line.view.
+
+        :param coords: (np.ndarray) vertex coordinates [n,2] or [n,3]
+        :param rings: (list of int) index of the first vertex of each ring; default a single ring.
+        :return: (Polygon) polygon.
+        """
+        polygon = Line.view.__func__(cls, coords)
+        polygon.rings = rings
+        return polygon
+
+    @property
+    def coords(self):
+        return Line.coords.fget(self)
+
+    @coords.setter
+    def coords(self, points):
+        # new coordinates start over as a single ring
+        Line.coords.fset(self, points)
+        self.rings = None
+
+    @property
+    def rings(self):
+        return self.__rings
+
+    @rings.setter
+    def rings(self, starts):
+        starts = np.array([0] if starts is None else starts, dtype=int)
+        if starts.shape[0] == 0 or starts[0] != 0 or np.any(np.diff(starts) <= 0):
+            raise ValueError("Rings must be increasing vertex indices starting at 0.")
+        self.__rings = starts
+
+    def getNumRings(self):
+        return self.__rings.shape[0]
+
+    def getRing(self, i):
+        """
+        Coordinates of one ring of the polygon.
+
+        :param i: (int) ring number
+        :return: (np.ndarray) vertex coordinates of the ring.
+        """
+        ends = np.append(self.__rings[1:], self.getNumPoints())
+        return self.coords[self.__rings[i]:ends[i]]
+
+    def addRing(self, points):
+        """
+        Adds a ring to the polygon: a hole (inside another ring) or a separate part.  With the winding number
+        methods ('w', nonzero rule) a hole must run the opposite way to the ring around it; with the ray
+        casting methods ('rc', even-odd rule) ring direction does not matter.
+
+        :param points: (list of np.ndarray or np.ndarray) vertex coordinates of the ring
+        """
+        if self.coords is None:
+            self.coords = points
+        else:
+            rings = np.append(self.__rings, self.getNumPoints())
+            self.coords = [self.coords, np.vstack(points)]
+            self.rings = rings
+
+    def getEndPoint(self):
+        return self.getStartPoint()
+
+    def isInside(self, polygon, plot=False):
+        """ Overwrites generic isInside function, since polygon inside polygon is out of scope. """
+        return "isInside not implemented for polygon objects"
+
+    def prepare(self, maxBytes=None):
+        """
+        Prepares the polygon for repeated point in polygon queries.  The PreparedPolygon is cached and only
+        rebuilt once the coordinates or rings have been replaced (e.g. through the coords setter or addRing) or
+        the coordinates have been written in place (checked on every call, see PreparedPolygon.matches).
+        addPoint and moveVertex update it in place instead.
+
+        :param maxBytes: (int) approximate memory budget for one block of temporaries in the vectorized tests;
+                        kept for later calls.  Default None keeps the budget set before, or CHUNK_BYTES.
+        :return: (PreparedPolygon) cached edge data for this polygon.
+        """
+        if maxBytes is not None:
+            self._maxBytes = maxBytes
+        prepared = getattr(self, '_prepared', None)
+        if prepared is None or prepared.source is not self.coords or prepared.rings is not self.rings or \
+                not prepared.matches(self.coords):
+            prepared = self._prepared = PreparedPolygon(self.coords, self.rings)
+        prepared.maxBytes = getattr(self, '_maxBytes', None)
+        return prepared
+
+    def addPoint(self, point):
+        """
+        Adds a vertex to the end of the last ring.  If the polygon has been prepared, the PreparedPolygon is
+        updated in place (see PreparedPolygon.appendVertex) rather than rebuilt on next use.
+
+        :param point: (np.ndarray) coordinates of the new vertex
+        :return: (tuple) the change, for PIP.reclassify; None if the polygon had not been prepared.
+        """
+        prepared = getattr(self, '_prepared', None)
+        current = prepared is not None and prepared.source is self.coords and prepared.rings is self.rings and \
+            prepared.matches(self.coords)
+        Line.addPoint(self, point)
+        if current:
+            change = prepared.appendVertex(self.coords[-1])
+            prepared.source = self.coords
+            return change
+
+    def moveVertex(self, i, point):
+        """
+        Moves a vertex.  If the polygon has been prepared, the PreparedPolygon is updated in place
+        (see PreparedPolygon.moveVertex).
+
+        :param i: (int) index of the vertex to move
+        :param point: (np.ndarray) new coordinates of the vertex
+        :return: (tuple) the change, for PIP.reclassify; None if the polygon had not been prepared.
+        """
+        prepared = getattr(self, '_prepared', None)
+        current = prepared is not None and prepared.source is self.coords and prepared.rings is self.rings and \
+            prepared.matches(self.coords)
+        Line.setPoint(self, i, point)
+        if current:
+            prepared.source = self.coords
+            return prepared.moveVertex(i, self.coords[i])
+
+    def isConvex(self):
+        """
+        Whether the polygon is a single convex ring; worked out once and cached with the PreparedPolygon.
+        Convex polygons are tested with the O(log n) triangle fan (see ConvexFan) by default.
+
+        :return: (bool) true if convex.
+        """
+        return self.prepare().convex
+
+    def buildGrid(self, resolution=None):
+        """
+        Precomputes the cell grid used by contains(..., index='grid').  Only needed to choose the resolution;
+        otherwise the grid is built with a resolution chosen from the vertex count on first use.
+
+        :param resolution: (int or sequence) cells along the longer side of the bounding box, or (columns, rows)
+                        as a tuple, list or array.
+        :return: (CellGrid) cell grid of the polygon.
+        """
+        return self.prepare().cellGrid(resolution)
+
+    # test pip for list of points (or singleton)
+    # known bug: if used to plot output for only one point, a "phantom point" will appear for the
+    # category not hit (e.g. a phantom outside will appear if the single point is inside)
+    def contains(self, points, plot=False, method='w+', save=False, index=None, workers=None, backend=None,
+                 maxBytes=None):
+        """
+        Tests whether provided points are within boundaries of the Polygon.
+
+        :param points: (Point, list of Points, Line, PointCollection)
+        :param plot: (Bool) true to enable plotting; default false.
+                        Must be true to enable saving.
+        :param method: (str) method of computing point in polygon.  Valid inputs:
+                        'ol' - points on lines only
+                        'ov' - points on vertices only
+                        'lv' - points on lines or vertices
+                        'w' - winding number algorithm
+                        'w+' - winding number PLUS any points on lines/vertices (DEFAULT)
+                        'rc' - ray casting algorithm
+                        'rc+' - ray casting algorithm PLUS any points on lines/vertices
+        :param save: (bool) true to enable saving; default false.
+                        True saves image in code location folder as "PIP_visualization_{methodname}.html".
+        :param index: (str) edge index to use: 'slab' (see SlabIndex), 'grid' (see CellGrid) or, for convex
+                        polygons, 'convex' (see ConvexFan); default None chooses a backend for the workload
+                        (see chooseBackend).
+        :param workers: (int) number of processes to spread the points over; default None (serial).
+                        Small inputs are always tested serially.  Processes are only started if workers (or
+                        backend 'parallel') is given; scripts that do so must guard their entry point with
+                        if __name__ == '__main__' on platforms that spawn workers (Windows, macOS).
+        :param backend: (str) name of the backend to use (see BACKENDS); default None chooses a serial one for
+                        the workload.
+        :param maxBytes: (int) approximate memory budget for one block of temporaries, see prepare.
+
+        :return: if plot = False, returns (np.ndarray) of bool for each point indicating in/out.
+        """
+        pts = self._pointCoords(points)
+        if isinstance(pts, str):
+            return pts
+
+        # run pip, plot if required
+        pip = PIP(pts, self.prepare(maxBytes))
+        if plot:
+            pip.viewPIP(method=method, save=save)
+        else:
+            return pip.pointInPolygon(method=method, index=index, workers=workers, backend=backend)
+
+
+    def _pointCoords(self, points):
+        """
+        Coordinates of the points given to contains or distances.
+
+        :param points: (Point, list of Points, Line, PointCollection)
+        :return: (np.ndarray) point coordinates, or (str) error message.
+        """
+        # ERROR CHECKING: ensure that points are correctly formatted
+        if isinstance(points, Point):
+            pts = points.coords
+
+        # reformat list of points into np.ndarray of coordintates
+        elif isinstance(points, list):
+            if all(isinstance(p, Point) for p in points):
+                # append all coords together
+                pts = np.array([(p.x, p.y, p.z) for p in points], dtype=float).reshape(-1, 3)
+            else:
+                return "List must contain only point objects."
+
+        # extract all coordinates from line or point collection
+        elif isinstance(points, (Line, PointCollection)):
+            pts = points.coords
+
+        # catchall case for improperly formatted points
+        else:
+            return "Please supply point or list of points."
+        return pts
+
+    def distances(self, points, signed=True, method='w', index=None):
+        """
+        Distance from each point to the boundary of the Polygon (nearest point of any edge of any ring).
+
+        :param points: (Point, list of Points, Line, PointCollection)
+        :param signed: (bool) true (DEFAULT) for negative distances inside the polygon, positive outside
+        :param method: (str) interior rule for the sign: 'w' (DEFAULT) or 'rc'.
+        :param index: (str) edge index to use: None (all edges) or 'tree'; default chosen from the size of
+                        the polygon.
+        :return: (np.ndarray) float distance of each point; zero on the boundary.
+        """
+        pts = self._pointCoords(points)
+        if isinstance(pts, str):
+            return pts
+        prepared = self.prepare()
+        if index is None and (prepared.tree is not None or prepared.numEdge > SLAB_MIN_EDGES):
+            index = 'tree'
+        return prepared.distances(pts, signed=signed, method=method, index=index)
+
+    def containsLines(self, lines, method='w+', index=None):
+        """
+        Tests whether whole lines, not just their vertices, are within the Polygon: a line whose vertices are
+        all inside but which leaves the polygon between them (e.g. across a concave bay) is crossing.
+
+        :param lines: (Line, list of Lines) lines to test
+        :param method: (str) 'w+' or 'rc+' (DEFAULT 'w+'), or 'w' / 'rc' to count the boundary as outside.
+        :param index: (str) edge index for the segment/edge test: None (all edges) or 'slab'; default chosen
+                        from the size of the polygon.
+        :return: (np.ndarray) of int8 codes for each line: LINE_CONTAINED (every point inside), LINE_CROSSING
+                        (partly inside, or touching the boundary) or LINE_DISJOINT (no point inside or on the boundary).
+        """
+        if isinstance(lines, Line) and not isinstance(lines, Polygon):
+            lines = [lines]
+        if not isinstance(lines, list) or not all(isinstance(l, Line) for l in lines):
+            return "Please supply a line or list of lines."
+        if any(l.coords is None for l in lines):
+            return "Lines must contain coordinates."
+        if not lines:
+            return np.empty(0, dtype=np.int8)
+        prepared = self.prepare()
+        if index is None:
+            index = prepared.fallbackIndex()
+        coords = np.vstack([l.coords for l in lines])
+        offsets = np.cumsum([0] + [l.getNumPoints() for l in lines[:-1]])
+        return prepared.classifyLines(coords, offsets, method, index)
+
+    def streamContains(self, source, method='w+', index=None, chunkSize=STREAM_CHUNK_POINTS, binary=False,
+                       columns=3, workers=None, backend=None):
+        """
+        Tests the points of a file (or any iterable of point arrays) chunk by chunk, so that memory use stays
+        bounded however many points there are.
+
+        :param source: (str or iterable) path to a point file (see readPointChunks), or iterable of np.ndarray
+                        point coordinate chunks.
+        :param method: (str) method of computing point in polygon, see PIP.pointInPolygon.
+        :param index: (str) edge index to use, see PIP.pointInPolygon; default None chooses a backend for each
+                        chunk (see chooseBackend), so a small first chunk does not decide for the whole stream.
+        :param chunkSize: (int) number of points per chunk when reading a file
+        :param binary: (bool) true if the file is binary, see readPointChunks.
+        :param columns: (int) number of values per point in a binary file
+        :param workers: (int) number of processes to spread each chunk over; default None (serial).  One pool
+                        (see PointPool) is started for the whole stream.
+        :param backend: (str) name of the backend to use (see BACKENDS); 'parallel' is the same as giving
+                        workers the number of CPUs.
+        :return: (generator) of (int, np.ndarray) tuples: index of the first point of the chunk and bool in/out
+                        for each point in the chunk.
+        """
+        if isinstance(source, str):
+            source = readPointChunks(source, chunkSize=chunkSize, binary=binary, columns=columns)
+        prepared = self.prepare()
+        if backend == 'parallel':
+            workers, backend = workers or multiprocessing.cpu_count(), None
+        pool = None
+        if workers is not None and workers > 1 and shared_memory is not None:
+            pool = PointPool(prepared, chunkSize, method, prepared.fallbackIndex() if index is None else index,
+                             workers)
+        try:
+            start = 0
+            for pts in source:
+                if pool is not None:
+                    inside = pool.pointInPolygon(pts)
+                elif index is not None and backend is None:
+                    inside = prepared.pointInPolygon(pts, method, index=index)
+                else:
+                    inside = runBackend(prepared, pts, method, backend)
+                yield start, inside
+                start += pts.shape[0]
+        finally:
+            if pool is not None:
+                pool.close()
+
+    def containsToFile(self, source, outPath, method='w+', index=None, chunkSize=STREAM_CHUNK_POINTS,
+                       binary=False, columns=3, workers=None, backend=None):
+        """
+        Tests the points of a file chunk by chunk (see streamContains) and writes the results as they are computed.
+
+        :param source: (str or iterable) path to a point file, or iterable of np.ndarray point coordinate chunks.
+        :param outPath: (str) path of the results file.  If it ends in .csv or .txt, one 1 (inside) or 0 (outside)
+                        per line; otherwise one byte per point.
+        :param method: (str) method of computing point in polygon, see PIP.pointInPolygon.
+        :param index: (str) edge index to use, see PIP.pointInPolygon.
+        :param chunkSize: (int) number of points per chunk when reading a file
+        :param binary: (bool) true if the point file is binary, see readPointChunks.
+        :param columns: (int) number of values per point in a binary point file
+        :param workers: (int) number of processes, see streamContains.
+        :param backend: (str) name of the backend to use, see streamContains.
+        :return: (tuple) number of points tested, number of points inside.
+        """
+        text = os.path.splitext(outPath)[1].lower() in ('.csv', '.txt')
+        numPts, numInside = 0, 0
+        with open(outPath, 'w' if text else 'wb') as outFile:
+            for start, inside in self.streamContains(source, method, index, chunkSize, binary, columns,
+                                                     workers, backend):
+                if text:
+                    np.savetxt(outFile, inside, fmt='%d')
+                else:
+                    inside.astype(np.uint8).tofile(outFile)
+                numPts += inside.shape[0]
+                numInside += int(np.count_nonzero(inside))
+        return numPts, numInside
+
+
+class PreparedPolygon(object):
+    """
+    Polygon vertices prepared for repeated point in polygon queries.  The bounding box, closed edge arrays,
+    edge extents, vertex lookup and orientation are computed once on creation and shared by every query,
+    so any number of point batches can be tested without rebuilding them.
+    """
+    def __init__(self, poly, rings=None, maxBytes=None):
+        """
+        Initialization function.
+
+        :param poly: (np.ndarray) array of coordinates of vertices of a polygon (different start/end; assumed to close).
+        :param rings: (np.ndarray) index of the first vertex of each ring (see Polygon); default a single ring.
+                        Edges of all rings are tested together, so the winding number methods apply the nonzero
+                        rule and the ray casting methods the even-odd rule across every ring.
+        :param maxBytes: (int) approximate memory budget for one block of temporaries in the vectorized tests;
+                        default None uses CHUNK_BYTES (looked up on use, so it can be changed at run time).
+        """
+        # keep references to the source arrays so owners can tell when they have been replaced
+        self.source = poly
+        self.rings = np.array([0]) if rings is None else rings
+        self.coords = np.asarray(poly, dtype=float)
+        self.maxBytes = maxBytes
+        # edge start/end coordinates, closing the last vertex of each ring back to its first
+        numVerts = self.coords.shape[0]
+        starts = np.asarray(self.rings)
+        ends = np.append(starts[1:], numVerts)
+        following = np.arange(1, numVerts + 1)
+        following[ends - 1] = starts
+        self.following = following
+        # copies, so that they keep the vertices as prepared if the source is later written in place
+        self.x1 = np.array(self.coords[:, 0])
+        self.y1 = np.array(self.coords[:, 1])
+        self.x2 = self.x1[following]
+        self.y2 = self.y1[following]
+        # edge extents
+        self.minX, self.maxX = np.minimum(self.x1, self.x2), np.maximum(self.x1, self.x2)
+        self.minY, self.maxY = np.minimum(self.y1, self.y2), np.maximum(self.y1, self.y2)
+        # bounding box as xmin, ymin, xmax, ymax
+        self.bbox = np.array([self.x1.min(), self.y1.min(), self.x1.max(), self.y1.max()])
+        # hashed vertex coordinates for onVertices, counted so that vertices can be moved (see moveVertex)
+        self.vertices = collections.Counter(zip(self.x1.tolist(), self.y1.tolist()))
+        # signed area (shoelace formula): positive if counter-clockwise, negative if clockwise
+        # (summed over rings, so holes running the other way are subtracted)
+        self.area = 0.5 * np.sum(self.x1 * self.y2 - self.x2 * self.y1)
+        self.orientation = int(np.sign(self.area))
+        # optional edge indices and cell grid, built on demand by slabIndex / cellGrid / convexFan / edgeTree
+        self.slab = None
+        self.grid = None
+        self.fan = None
+        self.tree = None
+        # convexity and content hash, worked out on first use
+        self._convex = None
+        self._digest = None
+
+    def matches(self, coords):
+        """
+        Whether coordinates still hold the vertices this was prepared from: they may have been written in
+        place (e.g. coords[i] = ..., through Point.view, or in a memory map opened with mode 'r+').
+
+        :param coords: (np.ndarray) vertex coordinates [n,2] or [n,3]
+        :return: (bool) true if x and y of every vertex are unchanged.
+        """
+        return (coords.shape[0] == self.x1.shape[0] and np.array_equal(coords[:, 0], self.x1, equal_nan=True) and
+                np.array_equal(coords[:, 1], self.y1, equal_nan=True))
+
+    @property
+    def maxBytes(self):
+        return CHUNK_BYTES if self._maxBytes is None else self._maxBytes
+
+    @maxBytes.setter
+    def maxBytes(self, maxBytes):
+        self._maxBytes = maxBytes
+
+    @property
+    def numEdge(self):
+        return self.x1.shape[0]
+
+    @property
+    def convex(self):
+        """
+        True if the polygon is a single convex ring: every turn is in the same direction (collinear vertices
+        allowed, signed exactly, see orientation), at least three corners turn, the area is not zero and the
+        edges turn through one full revolution, which rules out self-intersecting stars.
+        """
+        if self._convex is None:
+            dx, dy = self.x2 - self.x1, self.y2 - self.y1
+            # repeated vertices give zero length edges, which do not turn
+            moved = (dx != 0) | (dy != 0)
+            x1, y1, x2, y2 = self.x1[moved], self.y1[moved], self.x2[moved], self.y2[moved]
+            dx, dy = dx[moved], dy[moved]
+            # turn at the end of each edge onto the next one
+            turn = np.sign(orientation(x1, y1, x2, y2, np.roll(x2, -1), np.roll(y2, -1)))
+            angle = np.arctan2(dx * np.roll(dy, -1) - dy * np.roll(dx, -1),
+                               dx * np.roll(dx, -1) + dy * np.roll(dy, -1))
+            self._convex = bool(len(self.rings) == 1 and np.count_nonzero(turn) >= 3 and self.area != 0 and
+                                ((turn >= 0).all() or (turn <= 0).all()) and
+                                np.isclose(abs(angle.sum()), 2 * np.pi))
+        return self._convex
+
+    @property
+    def digest(self):
+        """
+        Hash of the vertex coordinates (x and y) and rings, for ResultCache keys.  Taken from the prepared
+        copies (x1, y1), which change only through appendVertex and moveVertex (which reset it), never from
+        the source array, which may be written in place.
+        """
+        if self._digest is None:
+            digest = hashlib.blake2b(self.x1.tobytes(), digest_size=16)
+            digest.update(self.y1.tobytes())
+            digest.update(np.asarray(self.rings, dtype=np.int64).tobytes())
+            self._digest = digest.digest()
+        return self._digest
+
+    def slabIndex(self, numBands=None):
+        """
+        Returns the y-slab edge index of the polygon, building it on first use (or if numBands changes).
+
+        :param numBands: (int) number of horizontal bands; default chosen from the number of edges.
+        :return: (SlabIndex) edge index.
+        """
+        if self.slab is None or (numBands is not None and numBands != self.slab.requested):
+            self.slab = SlabIndex(self, numBands)
+        return self.slab
+
+    def cellGrid(self, resolution=None):
+        """
+        Returns the cell grid of the polygon, building it on first use (or if resolution changes).
+
+        :param resolution: (int or sequence) grid resolution, see CellGrid; default chosen from the number of edges.
+        :return: (CellGrid) cell grid.
+        """
+        # (columns, rows) given as any sequence is compared as a tuple
+        if np.ndim(resolution) == 1:
+            resolution = tuple(int(n) for n in resolution)
+        if self.grid is None or (resolution is not None and resolution != self.grid.requested):
+            self.grid = CellGrid(self, resolution)
+            self.grid.requested = resolution
+        return self.grid
+
+    def convexFan(self):
+        """
+        Returns the triangle fan of a convex polygon, building it on first use.
+
+        :return: (ConvexFan) triangle fan.
+        """
+        if self.fan is None:
+            if not self.convex:
+                raise ValueError("Polygon is not convex; use index None, 'slab' or 'grid'.")
+            self.fan = ConvexFan(self)
+        return self.fan
+
+    def edgeTree(self):
+        """
+        Returns an STR packed R-tree over the bounding boxes of the edges, building it on first use.  Used to
+        find the nearest edges to points (see distances), which the y-slab index cannot narrow down in x.
+
+        :return: (BoxTree) edge tree; its items are edge indices.
+        """
+        if self.tree is None:
+            self.tree = BoxTree(np.column_stack([self.minX, self.minY, self.maxX, self.maxY]))
+        return self.tree
+
+    def appendVertex(self, point):
+        """
+        Appends a vertex to the end of the last ring.  The closing edge of that ring is replaced by two edges,
+        through the new vertex, and the edge arrays, bounding box, vertex lookup and any slab index or cell grid
+        are updated in place rather than preparing the polygon again (see edited).
+
+        :param point: (np.ndarray) coordinates of the new vertex, as a row of coords
+        :return: (tuple) the change, see edited.
+        """
+        last, first, new = self.numEdge - 1, self.rings[-1], self.numEdge
+        self.coords = np.vstack([self.coords, np.asarray(point, dtype=float).reshape(1, -1)])
+        self.x1 = np.append(self.x1, self.coords[new, 0])
+        self.y1 = np.append(self.y1, self.coords[new, 1])
+        self.following = np.append(self.following, first)
+        self.following[last] = new
+        # placeholders for the new edge, filled in by edited
+        self.x2, self.y2 = np.append(self.x2, 0.0), np.append(self.y2, 0.0)
+        self.minX, self.maxX = np.append(self.minX, 0.0), np.append(self.maxX, 0.0)
+        self.minY, self.maxY = np.append(self.minY, 0.0), np.append(self.maxY, 0.0)
+        self.vertices[(float(self.x1[new]), float(self.y1[new]))] += 1
+        # the triangle between the old closing edge and the two new edges is all that changes
+        return self.edited(np.array([last, new]), np.array([last, new, first]), [])
+
+    def moveVertex(self, i, point):
+        """
+        Moves a vertex, updating the two edges that meet at it in place, see appendVertex.
+
+        :param i: (int) index of the vertex to move
+        :param point: (np.ndarray) new coordinates of the vertex, as a row of coords
+        :return: (tuple) the change, see edited.
+        """
+        ring = np.searchsorted(self.rings, i, side='right') - 1
+        end = self.rings[ring + 1] if ring + 1 < self.rings.shape[0] else self.numEdge
+        previous = end - 1 if i == self.rings[ring] else i - 1
+        old = (float(self.x1[i]), float(self.y1[i]))
+        self.vertices[old] -= 1
+        if not self.vertices[old]:
+            del self.vertices[old]
+        # coords may be a read only view of the source (e.g. a memory map)
+        if not self.coords.flags.writeable:
+            self.coords = self.coords.copy()
+        self.coords[i] = np.asarray(point, dtype=float).ravel()[:self.coords.shape[1]]
+        self.x1[i], self.y1[i] = self.coords[i, 0], self.coords[i, 1]
+        self.vertices[(float(self.x1[i]), float(self.y1[i]))] += 1
+        # the two triangles between the old and new positions of the edges are all that changes
+        return self.edited(np.array([previous, i]), np.array([previous, i, self.following[i]]), [old])
+
+    def edited(self, edgeIds, corners, oldCorners):
+        """
+        Brings everything derived from the vertices up to date after some edges have changed:
+        - edge ends and extents of the changed edges;
+        - bounding box, area and orientation;
+        - a slab index, if built, lists the changed edges as pending (tested for every band) until there are
+          more of them than in an average band, when it is rebuilt;
+        - a cell grid, if built, marks every cell the change could reach as boundary, so points there go to
+          the exact tests;
+        - convexity, the convex fan and the edge tree are worked out again on next use.
+
+        :param edgeIds: (np.ndarray) changed (or new) edges
+        :param corners: (np.ndarray) vertices of the changed edges, at their new positions
+        :param oldCorners: (list of tuple) old (x, y) of any moved vertices
+        :return: (tuple) (np.ndarray) box xmin, ymin, xmax, ymax outside which no point's status changes, except
+                    (np.ndarray) points level with one of the given y values (the edge end rules and the onLine
+                    rule for horizontal edges reach along the whole row) and (np.ndarray) points in only one
+                    of the bounding boxes before and after the edit [2,4]; see reclassify.
+        """
+        bboxes = np.array([self.bbox, self.bbox])
+        self.x2[edgeIds] = self.x1[self.following[edgeIds]]
+        self.y2[edgeIds] = self.y1[self.following[edgeIds]]
+        self.minX[edgeIds] = np.minimum(self.x1[edgeIds], self.x2[edgeIds])
+        self.maxX[edgeIds] = np.maximum(self.x1[edgeIds], self.x2[edgeIds])
+        self.minY[edgeIds] = np.minimum(self.y1[edgeIds], self.y2[edgeIds])
+        self.maxY[edgeIds] = np.maximum(self.y1[edgeIds], self.y2[edgeIds])
+        self.bbox = bboxes[1] = np.array([self.x1.min(), self.y1.min(), self.x1.max(), self.y1.max()])
+        self.area = 0.5 * np.sum(self.x1 * self.y2 - self.x2 * self.y1)
+        self.orientation = int(np.sign(self.area))
+
+        xs = np.append(self.x1[corners], [x for x, y in oldCorners])
+        ys = np.append(self.y1[corners], [y for x, y in oldCorners])
+        box = np.array([xs.min(), ys.min(), xs.max(), ys.max()])
+        levels = np.unique(ys)
+
+        if self.slab is not None:
+            self.slab.addPending(edgeIds)
+            if self.slab.pending.shape[0] * self.slab.numBands > self.numEdge:
+                self.slab = SlabIndex(self, self.slab.requested)
+        if self.grid is not None:
+            self.grid.markBox(box, levels)
+        self._convex = None
+        self._digest = None
+        self.fan = None
+        self.tree = None
+        return box, levels, bboxes
+
+    def reclassify(self, pts, inside, change, method='w+', index=None):
+        """
+        Brings point in polygon results up to date after an edit (see appendVertex and moveVertex): only the
+        points within the changed box, level with a changed vertex, or in only one of the old and new bounding
+        boxes are tested again.
+
+        :param pts: (np.ndarray) coordinates of the points [n,2] or [n,3]
+        :param inside: (np.ndarray) results for these points from before the edit; updated in place
+        :param change: (tuple) as returned by appendVertex or moveVertex
+        :param method: (str) method the results were computed with, see PIP.pointInPolygon.
+        :param index: (str) edge index to use, see pointInPolygon; default chosen as by runBackend.
+        :return: (np.ndarray) int indices of the points tested again.
+        """
+        box, levels, bboxes = change
+        within = [(pts[:, 0] >= b[0]) & (pts[:, 0] <= b[2]) & (pts[:, 1] >= b[1]) & (pts[:, 1] <= b[3])
+                  for b in (box, bboxes[0], bboxes[1])]
+        near = np.flatnonzero(within[0] | (within[1] != within[2]) | np.isin(pts[:, 1], levels))
+        if index is None:
+            inside[near] = runBackend(self, pts[near], method)
+        else:
+            inside[near] = self.pointInPolygon(pts[near], method, index=index)
+        return near
+
+    def fallbackIndex(self):
+        """
+        Edge index for exact tests made on behalf of another structure: the slab index if it has been built
+        or the polygon is large, otherwise none.
+
+        :return: (str) 'slab' or None.
+        """
+        return 'slab' if self.slab is not None or self.numEdge > SLAB_MIN_EDGES else None
+
+    def pairs(self, pts, index=None):
+        """
+        Blocks of (points, edges) to evaluate for a batch of points, either every point against every edge or,
+        with the slab index, each point only against the edges whose y-extent covers it.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]
+        :param index: (str) edge index to use: None (all edges) or 'slab'.
+        :return: (generator) of (points, edges) tuples of slices or index arrays.
+        """
+        if index == 'slab':
+            return self.slabIndex().pairs(pts, self.maxBytes)
+        elif index is None:
+            return pairBlocks(pts.shape[0], self.numEdge, self.maxBytes)
+        raise ValueError("Unknown index '{0}'; use None or 'slab'.".format(index))
+
+    @_timed('bbox')
+    def pointInBox(self, pts, tol=0.0):
+        """
+        Tests whether points are within the (tolerance padded) bounding box of the polygon.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]
+        :param tol: (float) distance by which to pad the bounding box; default 0.
+        :return: (np.ndarray) of bool, true/false for each point.
+        """
+        inBox = ((self.bbox[0] - tol <= pts[:, 0]) & (pts[:, 0] <= self.bbox[2] + tol) &
+                 (self.bbox[1] - tol <= pts[:, 1]) & (pts[:, 1] <= self.bbox[3] + tol))
+        if _stats is not None:
+            _stats.boxTested += inBox.shape[0]
+            _stats.boxRejected += inBox.shape[0] - int(np.count_nonzero(inBox))
+        return inBox
+
+    @_timed('winding')
+    def windingNumbers(self, pts, index=None):
+        """
+        Vectorized winding number of a batch of points.  Points and edges are processed in blocks
+        (see pairBlocks) so that the temporaries stay within roughly maxBytes.  Gives the same result
+        as PIP.windingNumber on each point.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]
+        :param index: (str) edge index to use: None (all edges) or 'slab' (see SlabIndex).
+        :return: (np.ndarray) int winding number of each point.
+        """
+        x1, y1, x2, y2 = self.x1, self.y1, self.x2, self.y2
+        wn = np.zeros(pts.shape[0], dtype=int)
+        for p, e in self.pairs(pts, index):
+            px = pts[p, 0, np.newaxis]
+            py = pts[p, 1, np.newaxis]
+            # same orientation test as PIP.isLeft, for every point/edge pair at once
+            left = orientation(x1[e], y1[e], x2[e], y2[e], px, py)
+            # upward crossings with point strictly left, downward crossings with point strictly right
+            up = (y1[e] <= py) & (py < y2[e]) & (left > 0)
+            down = (y2[e] < py) & (py <= y1[e]) & (left < 0)
+            wn[p] += up.sum(axis=1) - down.sum(axis=1)
+            if _stats is not None:
+                _stats.edgesExamined += up.size
+        return wn
+
+    @_timed('crossing')
+    def rayCrossings(self, pts, index=None):
+        """
+        Vectorized ray crossing count of a batch of points (even-odd rule).  Points and edges are processed
+        in blocks (see pairBlocks) so that the temporaries stay within roughly maxBytes.  Gives the same
+        result as PIP.rayCrossing on each point.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]
+        :param index: (str) edge index to use: None (all edges) or 'slab' (see SlabIndex).
+        :return: (np.ndarray) int number of ray crossings of each point. Inside if odd, outside if even.
+        """
+        x1, y1, x2, y2 = self.x1, self.y1, self.x2, self.y2
+        rc = np.zeros(pts.shape[0], dtype=int)
+        for p, e in self.pairs(pts, index):
+            px = pts[p, 0, np.newaxis]
+            py = pts[p, 1, np.newaxis]
+            left = orientation(x1[e], y1[e], x2[e], y2[e], px, py)
+            # upward edges with the point to the left, downward edges with the point to the right
+            up = (y1[e] <= py) & (py < y2[e]) & (left > 0)
+            down = (y2[e] <= py) & (py < y1[e]) & (left < 0)
+            rc[p] += up.sum(axis=1) + down.sum(axis=1)
+            if _stats is not None:
+                _stats.edgesExamined += up.size
+        return rc
+
+    @_timed('lines')
+    def onLines(self, pts, tol=0.0, index=None):
+        """
+        Vectorized version of PIP.onLine for a batch of points.  With tol = 0 the test is exactly that of
+        onLine; with tol > 0 a point is on an edge if it is within tol of the edge's line and of its extent.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]
+        :param tol: (float) absolute distance tolerance; default 0 (exact).
+        :param index: (str) edge index to use: None (all edges) or 'slab' (see SlabIndex).  Only used if tol = 0.
+        :return: (np.ndarray) of bool, true if point is on a line (incl on a vertex of that line)
+        """
+        if tol:
+            # the slab index only holds edges whose y-extent covers the point, not those within tol of it
+            index = None
+        x1, y1, x2, y2 = self.x1, self.y1, self.x2, self.y2
+        hit = np.zeros(pts.shape[0], dtype=bool)
+        for p, e in self.pairs(pts, index):
+            px = pts[p, 0, np.newaxis]
+            py = pts[p, 1, np.newaxis]
+            minX, maxX, minY, maxY = self.minX[e], self.maxX[e], self.minY[e], self.maxY[e]
+            if tol:
+                # distance to the edge's line is |cross product| / edge length
+                left = (x2[e] - x1[e]) * (py - y1[e]) - (px - x1[e]) * (y2[e] - y1[e])
+                length = np.hypot(x2[e] - x1[e], y2[e] - y1[e])
+                on = ((np.abs(left) <= tol * length) & (minX - tol <= px) & (px <= maxX + tol) &
+                      (minY - tol <= py) & (py <= maxY + tol))
+            else:
+                # horizontal edges with x in range, or collinear with y in range (as in onLine)
+                left = orientation(x1[e], y1[e], x2[e], y2[e], px, py)
+                on = (((y1[e] == py) & (py == y2[e]) & (minX <= px) & (px <= maxX)) |
+                      ((minY <= py) & (py <= maxY) & (left == 0)))
+            hit[p] |= on.any(axis=1)
+            if _stats is not None:
+                _stats.edgesExamined += on.size
+        if _stats is not None:
+            _stats.linePoints += pts.shape[0]
+        return hit
+
+    @_timed('vertices')
+    def onVertices(self, pts):
+        """
+        Vectorized version of PIP.onVertex for a batch of points, using the hashed set of vertex coordinates
+        rather than scanning every vertex for every point.
 
-        :return: np array [2,4] containing coordinates of bounding box.
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]
+        :return: (np.ndarray) of bool, true if point is on a vertex
         """
-        # use min/max to get coordinates for each corner
-        corner1 = np.array([min(self.coords[:, 0]),  min(self.coords[:, 1])])
-        corner2 = np.array([max(self.coords[:, 0]), min(self.coords[:, 1])])
-        corner3 = np.array([max(self.coords[:, 0]), max(self.coords[:, 1])])
-        corner4 = np.array([min(self.coords[:, 0]), max(self.coords[:, 1])])
-        # create list of points (can be used to create polygon elsewhere
-        bbox = np.vstack([corner1, corner2, corner3, corner4])
-        # return list of points
-        return(bbox)
+        if _stats is not None:
+            _stats.vertexPoints += pts.shape[0]
+        vertices = self.vertices
+        return np.fromiter((pt in vertices for pt in zip(pts[:, 0].tolist(), pts[:, 1].tolist())),
+                           dtype=bool, count=pts.shape[0])
 
-    def isInside(self, polygon, plot=False, method='w+', save=False):
+    def interior(self, pts, method='w', index=None):
         """
-        Function to determine if object is inside a given polygon.
+        Interior test of a batch of points using the winding number ('w' in method) or ray crossing
+        ('rc' in method) rule.  Points on the boundary are not treated specially.
 
-        :param polygon: (Polygon) contains vertices of polygon
-        :param plot: (Bool) true to enable plotting; default false.
-                        Must be true to enable saving.
-        :param method: (str) method of computing point in polygon.  Valid inputs:
-                        'ol' - points on lines only
-                        'ov' - points on vertices only
-                        'lv' - points on lines or vertices
-                        'w' - winding number algorithm
-                        'w+' - winding number PLUS any points on lines/vertices (DEFAULT)
-                        'rc' - ray casting algorithm
-                        'rc+' - ray casting algorithm PLUS any points on lines/vertices
-        :param save: (bool) true to enable saving; default false.
-                        True saves image in code location folder as "PIP_visualization_{methodname}.html".
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]
+        :param method: (str) method of computing point in polygon, see PIP.pointInPolygon.
+        :param index: (str) edge index to use: None (all edges) or 'slab' (see SlabIndex).
+        :return: (np.ndarray) of bool, true if point is inside.
+        """
+        if 'w' in method:
+            return self.windingNumbers(pts, index) != 0
+        elif 'rc' in method:
+            return self.rayCrossings(pts, index) % 2 == 1
+        return np.ones(pts.shape[0], dtype=bool)
 
-        :return: if plot = False, returns (list) of (bool) for each point indicating in/out.
+    def classify(self, pts, method='w', tol=0.0, index=None, inBox=False):
         """
-        # ERROR CHECKING: ensure correct formatting
-        if isinstance(polygon, Polygon):
-            # create PIP instance (?)
-            pip = PIP(self.coords, polygon.coords)
+        Classifies a batch of points as outside, inside, on an edge or on a vertex of the polygon.
+        Vertex hits take precedence over edge hits, which take precedence over the interior test.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]
+        :param method: (str) 'w' or 'rc' (optionally with '+'); selects the interior rule.
+        :param tol: (float) absolute tolerance for edge hits; default 0 (exact).  Vertex hits are always exact.
+        :param index: (str) edge index to use: None (all edges) or 'slab' (see SlabIndex).
+        :param inBox: (bool) true if all points are already known to be within the bounding box, which is
+                        then not tested again; default false.
+        :return: (np.ndarray) of int8 codes OUTSIDE, INSIDE, ON_EDGE or ON_VERTEX for each point.
+        """
+        codes = np.full(pts.shape[0], OUTSIDE, dtype=np.int8)
+        # only points inside the (tolerance padded) bounding box can be anything but outside
+        boxed = np.arange(pts.shape[0]) if inBox else np.flatnonzero(self.pointInBox(pts, tol))
+        # vertex hits first, then edges and interior only for the remaining points
+        vertex = self.onVertices(pts[boxed])
+        codes[boxed[vertex]] = ON_VERTEX
+        boxed = boxed[~vertex]
+        edge = self.onLines(pts[boxed], tol=tol, index=index)
+        codes[boxed[edge]] = ON_EDGE
+        boxed = boxed[~edge]
+        codes[boxed[self.interior(pts[boxed], method, index)]] = INSIDE
+        return codes
+
+    def edgeDistances(self, pts, ptIds, edgeIds):
+        """
+        Distance from points to edges, for explicit (point, edge) pairs.
 
-            # plot, if desired, or return
-            if plot:
-                pip.viewPIP(method=method, save=save)
-            else:
-                return pip.pointInPolygon(method=method)
+        :param pts: (np.ndarray) coordinates of points [n,2] or [n,3]
+        :param ptIds: (np.ndarray) point of each pair (any shape, broadcast against edgeIds)
+        :param edgeIds: (np.ndarray) edge of each pair
+        :return: (np.ndarray) distance of each pair.
+        """
+        x1, y1 = self.x1[edgeIds], self.y1[edgeIds]
+        dx, dy = self.x2[edgeIds] - x1, self.y2[edgeIds] - y1
+        wx, wy = pts[ptIds, 0] - x1, pts[ptIds, 1] - y1
+        # nearest point of each edge: projection onto the edge clamped to its ends
+        length = dx * dx + dy * dy
+        t = np.clip((wx * dx + wy * dy) / np.where(length > 0, length, 1), 0, 1)
+        return np.hypot(wx - t * dx, wy - t * dy)
+
+    @_timed('distance')
+    def distances(self, pts, signed=True, method='w', index=None):
+        """
+        Vectorized distance from each point to the nearest point of the polygon boundary (any ring).
+        Without an index, every point is measured against every edge in memory-bounded blocks
+        (see pairBlocks).  With the edge tree, each point is only measured against the edges whose boxes
+        could hold its nearest point (see edgeTree and BoxTree.nearest).
+
+        :param pts: (np.ndarray) coordinates of points [n,2] or [n,3]
+        :param signed: (bool) true (DEFAULT) for negative distances inside the polygon
+        :param method: (str) interior rule for the sign: 'w' (DEFAULT) or 'rc', see PIP.pointInPolygon.
+        :param index: (str) edge index to use: None (all edges) or 'tree' (see edgeTree).
+        :return: (np.ndarray) float distance of each point; zero on the boundary.
+        """
+        numPts = pts.shape[0]
+        dist = np.full(numPts, np.inf)
+        if index == 'tree':
+            def distance(ptIds, edgeIds):
+                if _stats is not None:
+                    _stats.edgesExamined += edgeIds.shape[0]
+                return self.edgeDistances(pts, ptIds, edgeIds)
+            dist = self.edgeTree().nearest(pts, distance, max(1, self.maxBytes // PAIR_BYTES))
+        elif index is None:
+            for p, e in pairBlocks(numPts, self.numEdge, self.maxBytes):
+                ptIds = np.arange(numPts)[p]
+                near = self.edgeDistances(pts, ptIds[:, np.newaxis], np.arange(self.numEdge)[e]).min(axis=1)
+                dist[ptIds] = np.minimum(dist[ptIds], near)
+                if _stats is not None:
+                    _stats.edgesExamined += near.shape[0] * (e.stop - e.start)
         else:
-            return "Must supply a Polygon object."
+            raise ValueError("Unknown index '{0}'; use None or 'tree'.".format(index))
 
-    def fromCSV(self, filePath):
-        """
-        Allows geometry to be read in from CSV file, given path.  Contains moderate error checking.
-        Not implemented/valid for points.
+        if signed:
+            # points on the boundary stay at (positive) zero
+            inside = runBackend(self, pts, method.rstrip('+')) & (dist > 0)
+            dist[inside] = -dist[inside]
+        return dist
 
-        :param filePath: (str) path to CSV file containing geometry information.
-                First column contains x coord, second column contains y coord.  Text headers ignored.
-        :return: If successful, no return: sets geometry coordinates.  If unsuccessful, error message.
-        """
-        # test if file exists
-        if not os.path.isfile(filePath):
-            raise NameError("File path is not valid. Please enter a correct path to CSV.")
-        # if file exists, create vertices
-        vertices = np.empty([0, 3])
-        # open file to read in as CSV
-        with open(filePath, 'rb') as csvfile:
-            reader = csv.reader(csvfile)
-            # read through each row of reader
-            for row in reader:
-                # only convert rows that are integer valued
-                if row[0].isdigit() and row[1].isdigit():
-                    # convert each row to point array
-                    pt = np.array([float(row[0]), float(row[1]), np.nan])
-                    # add to vertex array
-                    vertices = np.vstack((vertices, pt))
-        # ensure resultant set isn't empty
-        if vertices.shape[1] > 0:
-            self.coords = vertices
+    def segmentPairs(self, starts, ends, index=None):
+        """
+        Candidate (segment, edge) pairs for segmentIntersections: pairs whose bounding boxes overlap, drawn
+        either from every edge or, with the slab index, from the edges of the bands each segment spans.
+        Each pair is given once, and in blocks of at most about maxBytes of temporaries (counting
+        SEGMENT_PAIR_BYTES per pair, for the intersection arithmetic that follows).
+
+        :param starts: (np.ndarray) segment start coordinates [m,2] or [m,3]
+        :param ends: (np.ndarray) segment end coordinates [m,2] or [m,3]
+        :param index: (str) edge index to use: None (all edges) or 'slab'.
+        :return: (generator) of (np.ndarray, np.ndarray) tuples of segment and edge indices.
+        """
+        segMinX, segMaxX = np.minimum(starts[:, 0], ends[:, 0]), np.maximum(starts[:, 0], ends[:, 0])
+        segMinY, segMaxY = np.minimum(starts[:, 1], ends[:, 1]), np.maximum(starts[:, 1], ends[:, 1])
+        maxPairs = max(1, self.maxBytes // SEGMENT_PAIR_BYTES)
+        if index == 'slab':
+            slab = self.slabIndex()
+            # bands spanned by each segment, and the number of (possibly repeated) edges in them
+            first = np.clip(np.searchsorted(slab.bounds, segMinY, side='right') - 1, 0, slab.numBands - 1)
+            last = np.clip(np.searchsorted(slab.bounds, segMaxY, side='right') - 1, 0, slab.numBands - 1)
+            counts = slab.offsets[last + 1] - slab.offsets[first]
+            # first band of each edge (as in SlabIndex): a pair met in several bands is kept in the first only
+            edgeFirst = np.clip(np.searchsorted(slab.bounds, self.minY, side='left') - 1, 0, slab.numBands - 1)
+            # groups of consecutive segments with about maxBytes worth of pairs each
+            for low, high in countBlocks(counts, maxPairs):
+                segs = np.arange(low, high)
+                owner, entry = expandRanges(slab.offsets[first[segs]], counts[segs])
+                seg, edge = segs[owner], slab.edgeIds[entry]
+                band = np.searchsorted(slab.offsets, entry, side='right') - 1
+                overlap = ((self.minX[edge] <= segMaxX[seg]) & (segMinX[seg] <= self.maxX[edge]) &
+                           (self.minY[edge] <= segMaxY[seg]) & (segMinY[seg] <= self.maxY[edge]) &
+                           (band == np.maximum(first[seg], edgeFirst[edge])))
+                yield seg[overlap], edge[overlap]
+            candidates = slab.pending
+        elif index is None:
+            candidates = np.arange(self.numEdge)
         else:
-            print(vertices.shape[1])
-            return "File must contain coordinates."
+            raise ValueError("Unknown index '{0}'; use None or 'slab'.".format(index))
+
+        # every segment against every candidate edge (all edges, or the slab's pending edges)
+        if candidates.shape[0]:
+            for p, e in pairBlocks(starts.shape[0], candidates.shape[0], maxPairs * PAIR_BYTES):
+                segs, edges = np.arange(starts.shape[0])[p], candidates[e]
+                overlap = ((self.minX[edges] <= segMaxX[segs, np.newaxis]) &
+                           (segMinX[segs, np.newaxis] <= self.maxX[edges]) &
+                           (self.minY[edges] <= segMaxY[segs, np.newaxis]) &
+                           (segMinY[segs, np.newaxis] <= self.maxY[edges]))
+                seg, edge = np.nonzero(overlap)
+                yield segs[seg], edges[edge]
+
+    def segmentIntersections(self, starts, ends, index=None):
+        """
+        Every place where a batch of segments meets the edges of the polygon, as the position along the
+        segment (0 at its start, 1 at its end).  Segments that run along an edge give the two ends of the
+        shared part.  Evaluated for all candidate pairs at once (see segmentPairs).
+
+        :param starts: (np.ndarray) segment start coordinates [m,2] or [m,3]
+        :param ends: (np.ndarray) segment end coordinates [m,2] or [m,3]
+        :param index: (str) edge index to use: None (all edges) or 'slab'.
+        :return: (tuple of np.ndarray) segment index and position of each intersection.
+        """
+        segIds, positions = [np.empty(0, dtype=int)], [np.empty(0)]
+        for seg, edge in self.segmentPairs(starts, ends, index):
+            px, py = starts[seg, 0], starts[seg, 1]
+            rx, ry = ends[seg, 0] - px, ends[seg, 1] - py
+            qx, qy = self.x1[edge], self.y1[edge]
+            sx, sy = self.x2[edge] - qx, self.y2[edge] - qy
+            wx, wy = qx - px, qy - py
+            # cross products: zero denominator means parallel, then zero numerators mean on the same line
+            denom = rx * sy - ry * sx
+            tNum = wx * sy - wy * sx
+            uNum = wx * ry - wy * rx
+            crossing = denom != 0
+            safe = np.where(crossing, denom, 1)
+            t, u = tNum / safe, uNum / safe
+            hit = crossing & (0 <= t) & (t <= 1) & (0 <= u) & (u <= 1)
+            # collinear: positions of the edge ends along the segment, kept if the two overlap
+            length = rx * rx + ry * ry
+            collinear = ~crossing & (tNum == 0) & (uNum == 0) & (length > 0)
+            safe = np.where(collinear, length, 1)
+            t1 = (wx * rx + wy * ry) / safe
+            t2 = ((wx + sx) * rx + (wy + sy) * ry) / safe
+            overlap = collinear & (np.maximum(t1, t2) >= 0) & (np.minimum(t1, t2) <= 1)
+            segIds += [seg[hit], seg[overlap], seg[overlap]]
+            positions += [t[hit], np.clip(t1[overlap], 0, 1), np.clip(t2[overlap], 0, 1)]
+            if _stats is not None:
+                _stats.edgesExamined += seg.shape[0]
+        return np.concatenate(segIds), np.concatenate(positions)
+
+    def classifyLines(self, coords, offsets, method='w+', index=None):
+        """
+        Classifies lines (polylines) as contained in, crossing or disjoint from the polygon.  Every segment is
+        split where it meets the polygon boundary (see segmentIntersections); each piece is then wholly inside
+        or wholly outside, so testing the line's vertices and the midpoint of every piece decides the line.
+
+        :param coords: (np.ndarray) vertex coordinates of all lines, one after another [n,2] or [n,3]
+        :param offsets: (np.ndarray) index of the first vertex of each line
+        :param method: (str) 'w+' or 'rc+' (or 'w' / 'rc' to leave the boundary out); see PIP.pointInPolygon.
+        :param index: (str) edge index for the segment test: None (all edges) or 'slab'.
+        :return: (np.ndarray) of int8 codes LINE_CONTAINED, LINE_CROSSING or LINE_DISJOINT for each line.
+        """
+        numVerts = coords.shape[0]
+        offsets = np.asarray(offsets)
+        lineOf = np.repeat(np.arange(offsets.shape[0]), np.diff(np.append(offsets, numVerts)))
+        # segments join consecutive vertices of the same line
+        segStart = np.flatnonzero(lineOf[:-1] == lineOf[1:])
+        starts, ends = coords[segStart, :2], coords[segStart + 1, :2]
+        segIds, positions = self.segmentIntersections(starts, ends, index)
+
+        # pieces between consecutive intersections (and the segment ends) along each segment
+        cuts = np.concatenate([segIds, np.arange(segStart.shape[0]), np.arange(segStart.shape[0])])
+        at = np.concatenate([positions, np.zeros(segStart.shape[0]), np.ones(segStart.shape[0])])
+        order = np.lexsort((at, cuts))
+        cuts, at = cuts[order], at[order]
+        piece = (cuts[:-1] == cuts[1:]) & (at[:-1] < at[1:])
+        middle = (at[:-1][piece] + at[1:][piece]) / 2
+        pieceSeg = cuts[:-1][piece]
+        midpoints = starts[pieceSeg] + middle[:, np.newaxis] * (ends[pieceSeg] - starts[pieceSeg])
+
+        # vertices and piece midpoints, each tagged with its line
+        inside = runBackend(self, np.vstack([coords[:, :2], midpoints]), method)
+        owner = np.concatenate([lineOf, lineOf[segStart[pieceSeg]]])
+        numLines = offsets.shape[0]
+        numInside = np.bincount(owner, weights=inside, minlength=numLines)
+        numTested = np.bincount(owner, minlength=numLines)
+        touches = np.bincount(lineOf[segStart[segIds]], minlength=numLines) > 0
+
+        codes = np.full(numLines, LINE_CROSSING, dtype=np.int8)
+        codes[numInside == numTested] = LINE_CONTAINED
+        codes[(numInside == 0) & ~touches] = LINE_DISJOINT
+        return codes
+
+    def pointInPolygon(self, pts, method='w+', index=None, inBox=False):
+        """
+        Vectorized point in polygon test of a batch of points, see PIP.pointInPolygon.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]
+        :param method: (str) method of computing point in polygon, see PIP.pointInPolygon.
+        :param index: (str) edge index to use: None (all edges), 'slab' (see SlabIndex), 'grid' (see CellGrid)
+                        or, for convex polygons, 'convex' (see ConvexFan).
+        :param inBox: (bool) true if all points are already known to be within the bounding box; default false.
+        :return: (np.ndarray) of bool, true is inside, false is outside.
+        """
+        if index == 'grid':
+            return self.cellGrid().pointInPolygon(pts, method)
+        elif index == 'convex':
+            return self.convexFan().pointInPolygon(pts, method)
 
+        # narrow points to test with bounding box
+        retVal = np.ones(pts.shape[0], dtype=bool) if inBox else self.pointInBox(pts)
+        boxed = np.flatnonzero(retVal)
+        pts = pts[boxed, :]
 
-class Point(Geom):    # Point class
-    """Point class; provided in assignment."""
-    def __init__(self, x=0, y=0, z=float('nan'), filepath=None):
-        self.__coords = np.array([x, y, z], dtype=float)
-        self.__coords.shape = (1, 3)
-    @property
-    def x(self):
-        return self.__coords[0, 0]
-    @property
-    def y(self):
-        return self.__coords[0, 1]
-    @property
-    def z(self):
-        return self.__coords[0, 2]
-    @x.setter
-    def x(self, x):
-        self.__coords[0, 0] = x
-    @y.setter   
-    def y(self, y):
-        self.__coords[0, 1] = y
-    @z.setter
-    def z(self, z):
-        self.__coords[0, 2] = z
-    @property
-    def coords(self):
-        return self.__coords
-    def addPoint(self, point):
-        return "Can't add a point to a point"
+        # all points inside the bounding box are tested in one vectorized pass
+        # see if its on a line or a vertex
+        if method == 'lv':
+            retVal[boxed] = self.onLines(pts, index=index) | self.onVertices(pts)
 
-    def fromCSV(self, filePath):
-        """Overwritten from Geom; single point cannot be read in as csv.  Read in as Line instead."""
-        return "Cannot import point from CSV.  Import as Line instead."
+        # see if its on a line
+        elif method == 'ol':
+            retVal[boxed] = self.onLines(pts, index=index)
 
+        # see if its on a vertex
+        elif method == 'ov':
+            retVal[boxed] = self.onVertices(pts)
 
-class Line(Geom):   # Line class
-    """ Line class; provided in assignment"""
-    def __init__(self, points=None):
-        if points is None:
-            self.__coords = None
-        # can initiate directly from CSV here
-        elif isinstance(points, str):
-            self.fromCSV(points)
+        # zip - need to be true on inside OR vertex OR boundary
+        elif "+" in method:
+            retVal[boxed] = self.classify(pts, method=method, index=index, inBox=True) != OUTSIDE
+
+        # winding number or ray casting algorithm alone
         else:
-            self.__coords = np.vstack(points)
+            retVal[boxed] = self.interior(pts, method=method, index=index)
+        return retVal
 
-    @property
-    def coords(self):
-        return self.__coords
 
-    @coords.setter
-    def coords(self, points):
-        self.__coords = np.vstack(points)
+class SlabIndex(object):
+    """
+    Edge index that sorts the edges of a PreparedPolygon into horizontal bands (slabs) of y.  Each point is
+    then only tested against the edges whose y-extent overlaps its band, rather than against every edge,
+    which is what makes coastline-scale polygons tractable.  Band edges are chosen at quantiles of the
+    vertex y values so that bands hold similar numbers of edges.
+    """
+    @_timed('index')
+    def __init__(self, prepared, numBands=None):
+        """
+        Initialization function.  Build time (seconds) and memory (bytes) are kept in buildTime and nbytes.
 
-    def addPoint(self, point):
-        if self.__coords is None:
-            self.__coords = point
-            self.__coords.shape = (1,3)
+        :param prepared: (PreparedPolygon) polygon to index
+        :param numBands: (int) number of horizontal bands; default square root of the number of edges.
+        """
+        start = time.time()
+        self.requested = numBands
+        if numBands is None:
+            numBands = int(np.sqrt(prepared.numEdge))
+        numBands = max(1, numBands)
+        # band boundaries at quantiles of the vertex y values (duplicates removed)
+        bounds = np.unique(np.quantile(prepared.y1, np.linspace(0, 1, numBands + 1)))
+        if bounds.shape[0] < 2:
+            bounds = np.repeat(bounds, 2)
+        self.bounds = bounds
+        self.numBands = bounds.shape[0] - 1
+
+        # each edge goes into every closed band [bounds[k], bounds[k+1]] its y-extent overlaps
+        first = np.clip(np.searchsorted(bounds, prepared.minY, side='left') - 1, 0, self.numBands - 1)
+        last = np.clip(np.searchsorted(bounds, prepared.maxY, side='right') - 1, 0, self.numBands - 1)
+        counts = last - first + 1
+        edgeIds = np.repeat(np.arange(prepared.numEdge), counts)
+        # band of each (edge, band) entry: first band of the edge plus position within the edge's run
+        runStart = np.repeat(np.cumsum(counts) - counts, counts)
+        bandIds = np.repeat(first, counts) + np.arange(edgeIds.shape[0]) - runStart
+        order = np.argsort(bandIds, kind='stable')
+        # compressed band -> edge lists: edges of band k are edgeIds[offsets[k]:offsets[k + 1]]
+        self.edgeIds = edgeIds[order]
+        self.offsets = np.searchsorted(bandIds[order], np.arange(self.numBands + 1))
+        # edges changed since the build (see addPending), tested for every band
+        self.pending = np.empty(0, dtype=int)
+
+        self.buildTime = time.time() - start
+        self.nbytes = self.bounds.nbytes + self.edgeIds.nbytes + self.offsets.nbytes
+
+    def addPending(self, edgeIds):
+        """
+        Takes edges out of their bands and onto the pending list, for edges that have changed since the index
+        was built: their old bands may no longer cover them, so they are tested against every point instead.
+
+        :param edgeIds: (np.ndarray) indices of the changed (or new) edges
+        """
+        new = np.setdiff1d(edgeIds, self.pending)
+        keep = ~np.isin(self.edgeIds, new)
+        bandIds = np.repeat(np.arange(self.numBands), np.diff(self.offsets))[keep]
+        self.edgeIds = self.edgeIds[keep]
+        self.offsets = np.searchsorted(bandIds, np.arange(self.numBands + 1))
+        self.pending = np.union1d(self.pending, new)
+
+    def bandOf(self, pts):
+        """
+        Band containing each point.  Points exactly on a band boundary may go in either band, as both hold
+        every edge touching that boundary.
+
+        :param pts: (np.ndarray) coordinates of points [n,2] or [n,3]
+        :return: (np.ndarray) int band of each point.
+        """
+        return np.clip(np.searchsorted(self.bounds, pts[:, 1], side='right') - 1, 0, self.numBands - 1)
+
+    def pairs(self, pts, maxBytes=None):
+        """
+        Blocks of (points, edges) to evaluate: the points of each band against the edges of that band and any
+        pending edges, split further by pairBlocks so the temporaries stay within maxBytes.
+
+        :param pts: (np.ndarray) coordinates of points [n,2] or [n,3]
+        :param maxBytes: (int) approximate memory budget for one block; default None uses CHUNK_BYTES.
+        :return: (generator) of (np.ndarray, np.ndarray) tuples of point and edge indices.
+        """
+        band = self.bandOf(pts)
+        order = np.argsort(band, kind='stable')
+        splits = np.searchsorted(band[order], np.arange(self.numBands + 1))
+        for k in np.flatnonzero(np.diff(splits)):
+            ptIds = order[splits[k]:splits[k + 1]]
+            edgeIds = self.edgeIds[self.offsets[k]:self.offsets[k + 1]]
+            if self.pending.shape[0]:
+                edgeIds = np.concatenate([edgeIds, self.pending])
+            for p, e in pairBlocks(ptIds.shape[0], edgeIds.shape[0], maxBytes):
+                yield ptIds[p], edgeIds[e]
+
+
+class CellGrid(object):
+    """
+    Uniform grid over the bounding box of a PreparedPolygon in which every cell is labelled as boundary (an edge
+    passes through or touches it) or, if no edge touches it, as fully inside or fully outside under each of the
+    winding number and ray crossing rules.  Most points are then answered with a single array lookup, and only
+    points in boundary cells fall through to the exact tests, so results are identical to the exact methods.
+    """
+    @_timed('index')
+    def __init__(self, prepared, resolution=None):
+        """
+        Initialization function.  Build time (seconds) and memory (bytes) are kept in buildTime and nbytes.
+
+        :param prepared: (PreparedPolygon) polygon to grid
+        :param resolution: (int or sequence) number of cells along the longer side of the bounding box, or
+                        (columns, rows).  Default gives about GRID_CELLS_PER_EDGE cells per polygon edge.
+        """
+        start = time.time()
+        self.prepared = prepared
+        xmin, ymin, xmax, ymax = prepared.bbox
+        width, height = xmax - xmin, ymax - ymin
+        if resolution is None:
+            resolution = int(np.sqrt(GRID_CELLS_PER_EDGE * prepared.numEdge)) + 1
+        if np.ndim(resolution) == 1:
+            numCols, numRows = [int(n) for n in resolution]
         else:
-            self.__coords = np.vstack([self.__coords, point])
-        
+            # square-ish cells with the given number of cells along the longer side
+            longest = max(width, height)
+            numCols = max(1, int(np.ceil(resolution * width / longest))) if longest > 0 else 1
+            numRows = max(1, int(np.ceil(resolution * height / longest))) if longest > 0 else 1
+        self.shape = (numRows, numCols)
+        self.origin = np.array([xmin, ymin])
+        # a zero-width (or height) bounding box still gets one cell of unit size
+        self.cellSize = np.array([width / numCols if width > 0 else 1.0, height / numRows if height > 0 else 1.0])
+
+        self.boundary = np.zeros(self.shape, dtype=bool)
+        self.markEdges(np.arange(prepared.numEdge))
+        # set once the polygon has been edited (see markBox); the polygon may then reach beyond the grid
+        self.edited = False
+
+        # points level with a vertex always take the exact path: there the winding number's edge end rules and
+        # PIP.onLine (which reports every point on the line through a horizontal edge) are not the same for the
+        # whole cell
+        self.vertexY = np.unique(prepared.y1)
+
+        # a run of consecutive non-boundary cells within a row contains no edges, so it is all inside or all
+        # outside: only the first cell of every run needs an exact test, at its centre
+        empty = ~self.boundary.ravel()
+        first = empty.copy()
+        first[1:] &= ~empty[:-1] | (np.arange(1, empty.shape[0]) % numCols == 0)
+        run = np.cumsum(first) - 1
+        cells = np.flatnonzero(first)
+        centres = self.origin + (np.column_stack([cells % numCols, cells // numCols]) + 0.5) * self.cellSize
+        # a centre level with a vertex (of another part or ring, elsewhere in the row) would meet the edge end
+        # rules, so move it to another height within its cell
+        middle = centres[:, 1].copy()
+        for shift in (0.25, -0.25, 0.125, -0.125, 0.375, -0.375):
+            level = np.isin(centres[:, 1], self.vertexY)
+            if not level.any():
+                break
+            centres[level, 1] = middle[level] + shift * self.cellSize[1]
+        index = 'slab' if prepared.numEdge > SLAB_MIN_EDGES else None
+        self.winding = np.zeros(self.shape, dtype=bool)
+        self.crossing = np.zeros(self.shape, dtype=bool)
+        self.winding.ravel()[empty] = (prepared.windingNumbers(centres, index) != 0)[run[empty]]
+        self.crossing.ravel()[empty] = (prepared.rayCrossings(centres, index) % 2 == 1)[run[empty]]
+
+        self.buildTime = time.time() - start
+        self.nbytes = self.boundary.nbytes + self.winding.nbytes + self.crossing.nbytes + self.vertexY.nbytes
+
+    def markEdges(self, edgeIds):
+        """
+        Marks every cell touched by the given edges as a boundary cell.  Cell ranges are padded by
+        GRID_SLACK of a cell so that rounding can never leave a touched cell unmarked.
 
-class Polygon(Line, Geom):  # Polygon class
-    """ Polygon class; provided in assessment. """
-    def getEndPoint(self):
-        return self.getStartPoint()
+        :param edgeIds: (np.ndarray) indices of the edges to mark
+        """
+        prepared = self.prepared
+        numRows, numCols = self.shape
+        (x0, y0), (dx, dy) = self.origin, self.cellSize
+        x1, y1, x2, y2 = prepared.x1[edgeIds], prepared.y1[edgeIds], prepared.x2[edgeIds], prepared.y2[edgeIds]
+        minY, maxY = prepared.minY[edgeIds], prepared.maxY[edgeIds]
+        # rows spanned by each edge, then one entry per (edge, row)
+        firstRow = np.clip(np.floor((minY - y0) / dy - GRID_SLACK), 0, numRows - 1).astype(int)
+        lastRow = np.clip(np.floor((maxY - y0) / dy + GRID_SLACK), 0, numRows - 1).astype(int)
+        edge, row = expandRanges(firstRow, lastRow - firstRow + 1)
+        # part of each edge within the (padded) row, as an x range
+        low = np.maximum(y0 + (row - GRID_SLACK) * dy, minY[edge])
+        high = np.minimum(y0 + (row + 1 + GRID_SLACK) * dy, maxY[edge])
+        # horizontal edges span their whole x range
+        rise = y2[edge] - y1[edge]
+        sloped = rise != 0
+        gradient = (x2[edge] - x1[edge]) / np.where(sloped, rise, 1)
+        xa = np.where(sloped, x1[edge] + (low - y1[edge]) * gradient, x1[edge])
+        xb = np.where(sloped, x1[edge] + (high - y1[edge]) * gradient, x2[edge])
+        firstCol = np.clip(np.floor((np.minimum(xa, xb) - x0) / dx - GRID_SLACK), 0, numCols - 1).astype(int)
+        lastCol = np.clip(np.floor((np.maximum(xa, xb) - x0) / dx + GRID_SLACK), 0, numCols - 1).astype(int)
+        entry, col = expandRanges(firstCol, lastCol - firstCol + 1)
+        self.boundary[row[entry], col] = True
+
+    def markBox(self, box, levels):
+        """
+        Updates the grid after an edit of the polygon (see PreparedPolygon.edited): every cell overlapping the
+        changed box becomes a boundary cell, and points level with the changed vertices take the exact path.
+        Cells outside the box keep their labels, as no point there changes status.
 
-    def isInside(self, polygon, plot=False):
-        """ Overwrites generic isInside function, since polygon inside polygon is out of scope. """
-        return "isInside not implemented for polygon objects"
+        :param box: (np.ndarray) changed box as xmin, ymin, xmax, ymax
+        :param levels: (np.ndarray) y values of the changed vertices
+        """
+        numRows, numCols = self.shape
+        (x0, y0), (dx, dy) = self.origin, self.cellSize
+        firstCol = int(np.clip(np.floor((box[0] - x0) / dx - GRID_SLACK), 0, numCols - 1))
+        lastCol = int(np.clip(np.floor((box[2] - x0) / dx + GRID_SLACK), 0, numCols - 1))
+        firstRow = int(np.clip(np.floor((box[1] - y0) / dy - GRID_SLACK), 0, numRows - 1))
+        lastRow = int(np.clip(np.floor((box[3] - y0) / dy + GRID_SLACK), 0, numRows - 1))
+        self.boundary[firstRow:lastRow + 1, firstCol:lastCol + 1] = True
+        self.vertexY = np.union1d(self.vertexY, levels)
+        self.edited = True
+
+    def cellOf(self, pts):
+        """
+        Row and column of the cell containing each point (points outside the grid are clipped to the border).
 
-    # test pip for list of points (or singleton)
-    # known bug: if used to plot output for only one point, a "phantom point" will appear for the
-    # category not hit (e.g. a phantom outside will appear if the single point is inside)
-    def contains(self, points, plot=False, method='w+', save=False):
+        :param pts: (np.ndarray) coordinates of points [n,2] or [n,3]
+        :return: (tuple of np.ndarray) rows, columns.
         """
-        Tests whether provided points are within boundaries of the Polygon.
+        cell = np.floor((pts[:, :2] - self.origin) / self.cellSize).astype(int)
+        return (np.clip(cell[:, 1], 0, self.shape[0] - 1), np.clip(cell[:, 0], 0, self.shape[1] - 1))
 
-        :param points: (Point, list of Points, Line)
-        :param plot: (Bool) true to enable plotting; default false.
-                        Must be true to enable saving.
-        :param method: (str) method of computing point in polygon.  Valid inputs:
-                        'ol' - points on lines only
-                        'ov' - points on vertices only
-                        'lv' - points on lines or vertices
-                        'w' - winding number algorithm
-                        'w+' - winding number PLUS any points on lines/vertices (DEFAULT)
-                        'rc' - ray casting algorithm
-                        'rc+' - ray casting algorithm PLUS any points on lines/vertices
-        :param save: (bool) true to enable saving; default false.
-                        True saves image in code location folder as "PIP_visualization_{methodname}.html".
+    @_timed('grid')
+    def pointInPolygon(self, pts, method='w+'):
+        """
+        Point in polygon test of a batch of points using the grid, see PIP.pointInPolygon.
 
-        :return: if plot = False, returns (list) of (bool) for each point indicating in/out.
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]
+        :param method: (str) method of computing point in polygon, see PIP.pointInPolygon.
+        :return: (np.ndarray) of bool, true is inside, false is outside.
         """
-        # ERROR CHECKING: ensure that points are correctly formatted
-        if isinstance(points, Point):
-            pts = points.coords
+        prepared = self.prepared
+        retVal = prepared.pointInBox(pts)
+        boxed = np.flatnonzero(retVal)
+        cell = self.cellOf(pts[boxed])
+
+        # points in cells without edges: lookup of the label for the method's rule
+        if method in ('lv', 'ol', 'ov'):
+            retVal[boxed] = False
+        elif 'w' in method:
+            retVal[boxed] = self.winding[cell]
+        elif 'rc' in method:
+            retVal[boxed] = self.crossing[cell]
+
+        # points in boundary cells (or level with a vertex): exact test
+        exact = self.boundary[cell] | np.isin(pts[boxed, 1], self.vertexY)
+        if self.edited:
+            # and points beyond the grid, which edits may have brought within the bounding box
+            low, high = self.origin, self.origin + self.cellSize * self.shape[::-1]
+            exact |= ((pts[boxed, :2] < low) | (pts[boxed, :2] > high)).any(axis=1)
+        exact = boxed[exact]
+        retVal[exact] = prepared.pointInPolygon(pts[exact], method, index=prepared.fallbackIndex(), inBox=True)
+        if _stats is not None:
+            _stats.gridLookups += boxed.shape[0] - exact.shape[0]
+            _stats.gridExact += exact.shape[0]
+        return retVal
 
-        # reformat list of points into np.ndarray of coordintates
-        elif isinstance(points, list):
-            if all(isinstance(p, Point) for p in points):
-                # append all coords together
-                pts = np.empty([0, 3])
-                for p in points:
-                    pts = np.vstack([pts, p.coords])
-            else:
-                return "List must contain only point objects."
 
-        # extract all coordinates from line
-        elif isinstance(points, Line):
-            pts = points.coords
+class ConvexFan(object):
+    """
+    Fan of triangles from one vertex of a convex polygon.  The triangle that could hold a point is found by
+    a binary search over the directions of the other vertices, and one more cross product with the polygon
+    edge opposite the fan vertex decides inside or outside, so each point costs O(log n) rather than O(n).
+    Every cross product is signed exactly (see orientation), so the search and the decision are exact;
+    points on an edge, and points level with a vertex, are passed to the exact tests, so results are
+    identical to the exact methods, boundary rules included.
+    """
+    @_timed('index')
+    def __init__(self, prepared):
+        """
+        Initialization function.
 
-        # catchall case for improperly formatted points
-        else:
-            return "Please supply point or list of points."
+        :param prepared: (PreparedPolygon) convex polygon (see PreparedPolygon.convex)
+        """
+        self.prepared = prepared
+        x, y = prepared.x1, prepared.y1
+        # corners only: drop repeated vertices and vertices part way along a straight side
+        moved = np.flatnonzero((prepared.x2 != x) | (prepared.y2 != y))
+        x, y, nextX, nextY = x[moved], y[moved], prepared.x2[moved], prepared.y2[moved]
+        corner = orientation(np.roll(x, 1), np.roll(y, 1), x, y, nextX, nextY) != 0
+        x, y = x[corner], y[corner]
+        # counter-clockwise order
+        if prepared.orientation < 0:
+            x, y = x[::-1], y[::-1]
+        self.x, self.y = x, y
+        # as for CellGrid, points level with a vertex meet the edge end rules of the exact tests
+        self.vertexY = np.unique(prepared.y1)
+
+    def side(self, i, j, px, py):
+        """
+        Side of the line from vertex i to vertex j that each point is on, signed exactly (see orientation).
 
-        # run pip, plot if required
-        pip = PIP(pts, self.coords)
-        if plot:
-            pip.viewPIP(method=method, save=save)
+        :param i: (np.ndarray or int) index of the first vertex
+        :param j: (np.ndarray or int) index of the second vertex
+        :param px: (np.ndarray) point x coordinates
+        :param py: (np.ndarray) point y coordinates
+        :return: (np.ndarray) positive if the point is left of i->j, negative if right, zero if on the line.
+        """
+        return orientation(self.x[i], self.y[i], self.x[j], self.y[j], px, py)
+
+    @_timed('convex')
+    def pointInPolygon(self, pts, method='w+'):
+        """
+        Point in polygon test of a batch of points using the fan, see PIP.pointInPolygon.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]
+        :param method: (str) method of computing point in polygon, see PIP.pointInPolygon.
+        :return: (np.ndarray) of bool, true is inside, false is outside.
+        """
+        prepared = self.prepared
+        retVal = prepared.pointInBox(pts)
+        boxed = np.flatnonzero(retVal)
+        px, py = pts[boxed, 0], pts[boxed, 1]
+        last = self.x.shape[0] - 1
+
+        # outside the wedge between the first and last sides from vertex 0
+        first = self.side(0, 1, px, py)
+        final = self.side(0, last, px, py)
+        # binary search for the fan triangle (0, low, low + 1) whose wedge holds the point
+        low = np.ones(boxed.shape[0], dtype=int)
+        high = np.full(boxed.shape[0], last, dtype=int)
+        while (high - low > 1).any():
+            mid = (low + high) // 2
+            left = self.side(0, mid, px, py) >= 0
+            low = np.where(left, mid, low)
+            high = np.where(left, high, mid)
+        # the polygon edge closing that triangle
+        edge = self.side(low, low + 1, px, py)
+
+        inside = (first > 0) & (final < 0) & (edge > 0)
+        # on the boundary: in the closed fan but on one of its lines
+        unsure = ((first >= 0) & (final <= 0) & (edge >= 0) & ~inside) | np.isin(py, self.vertexY)
+
+        # points off the boundary: inside the fan or not, for every method
+        if method in ('lv', 'ol', 'ov'):
+            retVal[boxed] = False
         else:
-            return pip.pointInPolygon(method=method)
+            retVal[boxed] = inside
+
+        # points on the boundary (or level with a vertex): exact test
+        exact = boxed[unsure]
+        retVal[exact] = prepared.pointInPolygon(pts[exact], method, index=prepared.fallbackIndex(), inBox=True)
+        return retVal
 
 
 class PIP(object):
@@ -262,20 +2585,29 @@ class PIP(object):
     Class for Point in Polygon operations.  Provides access to plotting, saving methods.  Can be used independently of
     geometry classes.
     """
-    # initiate object using np array for poly and nparray or list of nparrays for pts
-    def __init__(self, pts, poly):
+    # initiate object using np array or prepared polygon for poly and nparray or list of nparrays for pts
+    def __init__(self, pts, poly, maxBytes=None):
         """
         Initialization function.
 
         :param pts: (np.ndarray) array of point coordinates [n,3] or [n,2]
         :param poly: (np.ndarray) array of coordinates of vertices of a polygon (different start/end; assumed to close).
+                        A PreparedPolygon may be passed instead to reuse its cached edge data.
+        :param maxBytes: (int) approximate memory budget for one block of temporaries in the vectorized tests;
+                        default None keeps that of a PreparedPolygon, or uses CHUNK_BYTES.
         """
         if isinstance(pts, np.ndarray):
             self.__points = pts
+        if isinstance(pts, PointCollection):
+            self.__points = pts.coords
         if isinstance(pts, list) and all(isinstance(p, np.ndarray) for p in pts):
             self.points = np.vstack(pts)
-        if isinstance(poly, np.ndarray):
-            self.__polygon = poly
+        if isinstance(poly, PreparedPolygon):
+            self.__prepared = poly
+        elif isinstance(poly, np.ndarray):
+            self.polygon = poly
+        if maxBytes is not None:
+            self.__prepared.maxBytes = maxBytes
 
     # set/get points
     @property
@@ -284,38 +2616,36 @@ class PIP(object):
 
     @points.setter
     def points(self, pts):
-        if isinstance(pts,np.ndarray):
+        if isinstance(pts, PointCollection):
+            self.__points = pts.coords
+        elif isinstance(pts,np.ndarray):
             self.__points = pts
         else:
             return "Points must be np.ndarray."
 
-    # set/get polygon
+    # set/get polygon (the prepared coordinates, so that edits made through the PreparedPolygon are seen)
     @property
     def polygon(self):
-        return self.__polygon
+        return self.__prepared.coords
 
     @polygon.setter
     def polygon(self, poly):
         if isinstance(poly, np.ndarray):
-            self.__polygon = poly
+            self.__prepared = PreparedPolygon(poly)
         else:
             return "Polygon must be np.ndarray."
 
+    @property
+    def prepared(self):
+        return self.__prepared
+
     def pointInBox(self):
         """
         Tests whether all points are within the bounding box of the polygon.
 
-        :return: (list of bool) true/false for each point in the PIP object.
+        :return: (np.ndarray) of bool, true/false for each point in the PIP object.
         """
-        # list of T/F for each point
-        retVal = []
-        for point in self.__points:
-            if (min(self.__polygon[:, 0]) <= point[0] <= max(self.__polygon[:, 0]) and
-                    min(self.__polygon[:, 1]) <= point[1] <= max(self.__polygon[:, 1])):
-                retVal.append(True)
-            else:
-                retVal.append(False)
-        return retVal
+        return self.__prepared.pointInBox(self.__points)
 
     def isLeft(self, pt, e1, e2):
         """
@@ -327,9 +2657,16 @@ class PIP(object):
         :param e2: (np.ndarray) coordinates of end of line segment
         :return: 0 if on line, +1 if left, -1 if right
         """
-        return np.sign((e2[0] - e1[0]) * (pt[1] - e1[1])
-                       - (pt[0] - e1[0]) * (e2[1] - e1[1]))
-
+        # robust sign as in orientation, in plain floats for speed one point at a time
+        detLeft = float(e2[0] - e1[0]) * float(pt[1] - e1[1])
+        detRight = float(pt[0] - e1[0]) * float(e2[1] - e1[1])
+        det = detLeft - detRight
+        bound = ORIENT_ERROR * (abs(detLeft) + abs(detRight))
+        if abs(det) <= bound and bound > 0:
+            return _exactOrientation(e1[0], e1[1], e2[0], e2[1], pt[0], pt[1])
+        return (det > 0) - (det < 0)
+
+    @_timed('winding')
     def windingNumber(self, pt):
         """
         Determines the winding number of a given point for the stored polygon.
@@ -341,10 +2678,11 @@ class PIP(object):
         # initialize counter
         wn = 0
         # iterate through all edges
-        numEdge = self.__polygon.shape[0]
+        polygon = self.polygon
+        numEdge = polygon.shape[0]
         for i in range(numEdge):
-            e1 = self.__polygon[i, :]
-            e2 = self.__polygon[(i + 1) % numEdge, :]
+            e1 = polygon[i, :]
+            e2 = polygon[self.__prepared.following[i], :]
 
             # if edge crosses upward and p strictly left
             if e1[1] <= pt[1] < e2[1]:
@@ -356,8 +2694,21 @@ class PIP(object):
                 if self.isLeft(pt, e1, e2) == -1:  # must be right of line
                     wn -= 1
 
+        if _stats is not None:
+            _stats.edgesExamined += numEdge
         return wn
 
+    def windingNumbers(self, pts=None, index=None):
+        """
+        Vectorized winding number of a batch of points for the stored polygon, see PreparedPolygon.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]; default all stored points.
+        :param index: (str) edge index to use: None (all edges) or 'slab' (see SlabIndex).
+        :return: (np.ndarray) int winding number of each point.
+        """
+        return self.__prepared.windingNumbers(self.__points if pts is None else pts, index)
+
+    @_timed('crossing')
     def rayCrossing(self, pt):
         """
         Determines the number of ray crossings for a given point for the stored polygon.
@@ -368,11 +2719,12 @@ class PIP(object):
         # initialize counter
         rc = 0
         # iterate through all edges
-        numEdge = self.__polygon.shape[0]
+        polygon = self.polygon
+        numEdge = polygon.shape[0]
         for i in range(numEdge):
             # define edges
-            e1 = self.__polygon[i, :]
-            e2 = self.__polygon[(i + 1) % numEdge, :]
+            e1 = polygon[i, :]
+            e2 = polygon[self.__prepared.following[i], :]
             # does line go upward?
             if e1[1] <= pt[1] < e2[1]:  # upcross
                 # if so, is it on or to the left?
@@ -383,8 +2735,21 @@ class PIP(object):
                 # if so, is it on or to the "right"?
                 if self.isLeft(pt, e1, e2) == -1:
                     rc += 1
+        if _stats is not None:
+            _stats.edgesExamined += numEdge
         return rc
 
+    def rayCrossings(self, pts=None, index=None):
+        """
+        Vectorized ray crossing count of a batch of points for the stored polygon, see PreparedPolygon.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]; default all stored points.
+        :param index: (str) edge index to use: None (all edges) or 'slab' (see SlabIndex).
+        :return: (np.ndarray) int number of ray crossings of each point. Inside if odd, outside if even.
+        """
+        return self.__prepared.rayCrossings(self.__points if pts is None else pts, index)
+
+    @_timed('lines')
     def onLine(self, pt):
         """
         Function to determine if a point is on any line within the current polygon.
@@ -393,12 +2758,17 @@ class PIP(object):
         :param pt: (np.ndarray) coordinates of point to test
         :return: (bool) true if point is on a line (incl on a vertex of that line)
         """
+        if _stats is not None:
+            _stats.linePoints += 1
         # loop through all lines
-        numEdge = self.__polygon.shape[0]
+        polygon = self.polygon
+        numEdge = polygon.shape[0]
         for i in range(numEdge):
+            if _stats is not None:
+                _stats.edgesExamined += 1
             # define edges
-            e1 = self.__polygon[i, :]
-            e2 = self.__polygon[(i + 1) % numEdge, :]
+            e1 = polygon[i, :]
+            e2 = polygon[self.__prepared.following[i], :]
             # print(pt, e1, e2)
             # look for horizontal lines: if y values are equal...
             if e1[1] == pt[1] == e2[1]:
@@ -413,6 +2783,7 @@ class PIP(object):
                     return True
         return False
 
+    @_timed('vertices')
     def onVertex(self, pt):
         """
         Test to see if point is coincident with any vertex of the polygon.
@@ -420,16 +2791,113 @@ class PIP(object):
         :param pt: (np.ndarray) point to test
         :return: (bool) True if on a vertex, false otherwise
         """
-        numPts = self.__polygon.shape[0]
+        if _stats is not None:
+            _stats.vertexPoints += 1
+        polygon = self.polygon
+        numPts = polygon.shape[0]
         for i in range(numPts):
-            if pt[0] == self.__polygon[i, 0] and pt[1] == self.__polygon[i, 1]:
+            if pt[0] == polygon[i, 0] and pt[1] == polygon[i, 1]:
                 return True
         return False
 
-    def pointInPolygon(self, method='w+'):
+    def onLines(self, pts=None, tol=0.0, index=None):
+        """
+        Vectorized version of onLine for a batch of points, see PreparedPolygon.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]; default all stored points.
+        :param tol: (float) absolute distance tolerance; default 0 (exact).
+        :param index: (str) edge index to use: None (all edges) or 'slab' (see SlabIndex).
+        :return: (np.ndarray) of bool, true if point is on a line (incl on a vertex of that line)
+        """
+        return self.__prepared.onLines(self.__points if pts is None else pts, tol=tol, index=index)
+
+    def onVertices(self, pts=None):
+        """
+        Vectorized version of onVertex for a batch of points, see PreparedPolygon.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]; default all stored points.
+        :return: (np.ndarray) of bool, true if point is on a vertex
+        """
+        return self.__prepared.onVertices(self.__points if pts is None else pts)
+
+    def interior(self, pts=None, method='w', index=None):
+        """
+        Interior test of a batch of points using the winding number or ray crossing rule, see PreparedPolygon.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]; default all stored points.
+        :param method: (str) method of computing point in polygon, see pointInPolygon.
+        :param index: (str) edge index to use: None (all edges) or 'slab' (see SlabIndex).
+        :return: (np.ndarray) of bool, true if point is inside.
+        """
+        return self.__prepared.interior(self.__points if pts is None else pts, method=method, index=index)
+
+    def classify(self, pts=None, method='w', tol=0.0, index=None):
+        """
+        Classifies a batch of points as outside, inside, on an edge or on a vertex of the polygon.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]; default all stored points.
+        :param method: (str) 'w' or 'rc' (optionally with '+'); selects the interior rule.
+        :param tol: (float) absolute tolerance for edge hits; default 0 (exact).  Vertex hits are always exact.
+        :param index: (str) edge index to use: None (all edges) or 'slab' (see SlabIndex).
+        :return: (np.ndarray) of int8 codes OUTSIDE, INSIDE, ON_EDGE or ON_VERTEX for each point.
+        """
+        return self.__prepared.classify(self.__points if pts is None else pts, method=method, tol=tol, index=index)
+
+    def distances(self, pts=None, signed=True, method='w', index=None):
+        """
+        Distance from points to the polygon boundary, see PreparedPolygon.distances.
+
+        :param pts: (np.ndarray) coordinates of points [n,2] or [n,3]; default all stored points.
+        :param signed: (bool) true (DEFAULT) for negative distances inside the polygon
+        :param method: (str) interior rule for the sign: 'w' (DEFAULT) or 'rc'.
+        :param index: (str) edge index to use: None (all edges) or 'tree' (see PreparedPolygon.edgeTree).
+        :return: (np.ndarray) float distance of each point.
+        """
+        return self.__prepared.distances(self.__points if pts is None else pts, signed=signed, method=method,
+                                         index=index)
+
+    def scalarPointInPolygon(self, pts=None, method='w+'):
+        """
+        Reference point in polygon test, one point at a time with windingNumber, rayCrossing, onLine and onVertex.
+        Slow for many points, but has no array set-up cost, so it is the quickest way to test a handful.
+
+        :param pts: (np.ndarray) coordinates of points to test [n,2] or [n,3]; default all stored points.
+        :param method: (str) method of computing point in polygon, see pointInPolygon.
+        :return: (np.ndarray) of bool, true is inside, false is outside.
+        """
+        pts = self.__points if pts is None else pts
+        # narrow points to test with bounding box
+        retVal = self.__prepared.pointInBox(pts)
+        for i in np.flatnonzero(retVal):
+            pt = pts[i, :]
+            # see if its on a line or a vertex
+            if method == 'lv':
+                retVal[i] = self.onLine(pt) or self.onVertex(pt)
+            # see if its on a line
+            elif method == 'ol':
+                retVal[i] = self.onLine(pt)
+            # see if its on a vertex
+            elif method == 'ov':
+                retVal[i] = self.onVertex(pt)
+            # call winding number method
+            elif 'w' in method:
+                retVal[i] = self.windingNumber(pt) != 0
+            # call ray casting algorithm
+            elif 'rc' in method:
+                retVal[i] = self.rayCrossing(pt) % 2 == 1
+
+            # zip - need to be true on inside OR vertex OR boundary
+            if "+" in method:
+                retVal[i] = retVal[i] or self.onLine(pt) or self.onVertex(pt)
+        return retVal
+
+    def pointInPolygon(self, method='w+', index=None, workers=None, backend=None, out=None):
         """
         Overall method to determine if a point is in a polygon, including improvements via bounding box and
-        options to explicitly include points on edges and vertices.
+        options to explicitly include points on edges and vertices.  Unless an index, workers or backend is
+        given, the backend is chosen for the number of points and the size and shape of the polygon
+        (see chooseBackend); every backend gives the same result.  Results are looked up in, and added to, the
+        active ResultCache, if any.
 
         :param method: (str) method of computing point in polygon.  Valid inputs:
                         'ol' - points on lines only
@@ -439,54 +2907,79 @@ class PIP(object):
                         'w+' - winding number PLUS any points on lines/vertices (DEFAULT)
                         'rc' - ray casting algorithm
                         'rc+' - ray casting algorithm PLUS any points on lines/vertices
-        :return: (list of Bool), length = number of points to test.  True is inside, False is outside.
+        :param index: (str) edge index to use: 'slab' to only test each point against the edges whose
+                        y-extent covers it (see SlabIndex), 'grid' to look points up in a precomputed cell grid
+                        (see CellGrid) or, for convex polygons, 'convex' for the triangle fan (see ConvexFan);
+                        default None chooses a backend for the workload (see chooseBackend), which may use any
+                        of these or test every edge.
+        :param workers: (int) number of processes to spread the points over (see parallelPointInPolygon);
+                        default None tests in this process only.
+        :param backend: (str) pins the backend by name (see BACKENDS), e.g. 'scalar', 'vectorized', 'slab',
+                        'grid' or 'parallel', for reproducible timings; default None.
+        :param out: (np.ndarray) optional array of one element per point to write the results into (bool, or
+                        any numeric type for 0/1), e.g. a slice of a larger result array or a memory map.
+        :return: (np.ndarray) of bool (or out), length = number of points to test.  True is inside, False is
+                    outside.
         """
+        if out is not None and out.shape != (self.__points.shape[0],):
+            raise ValueError("out must have shape ({0},), not {1}.".format(self.__points.shape[0], out.shape))
+        cache = _cache
+        if cache is not None:
+            key = cache.key(self.__prepared, self.__points, method)
+            retVal = cache.get(key)
+            if retVal is not None:
+                if out is not None:
+                    np.copyto(out, retVal, casting='unsafe')
+                    return out
+                return retVal
+
+        if workers is not None:
+            retVal = parallelPointInPolygon(self.__prepared, self.__points, method=method, index=index,
+                                            workers=workers)
+        elif index is not None and backend is None:
+            retVal = self.__prepared.pointInPolygon(self.__points, method=method, index=index)
+        else:
+            retVal = runBackend(self.__prepared, self.__points, method=method, backend=backend)
+        if cache is not None:
+            cache.put(key, retVal)
 
-        # narrow points to test with bounding box
-        retVal = self.pointInBox()
-
-        # for points inside the bounding box
-        for i in range(len(retVal)):
-            if retVal[i]:
-                # see if its on a line or a vertex
-                if method == 'lv':
-                    lv = any([self.onLine(self.__points[i, :]), self.onVertex(self.__points[i, :])])
-                    retVal[i] = all([lv, retVal[i]])
-
-                # see if its on a line
-                elif method == 'ol':
-                    retVal[i] = all([retVal[i], self.onLine(self.__points[i, :])])
-
-                # see if its on a vertex
-                elif method == 'ov':
-                    retVal[i] = all([retVal[i], self.onVertex(self.__points[i, :])])
-
-                # call winding number method
-                elif 'w' in method:
-                    wn = self.windingNumber(self.__points[i, :])
-                    if wn != 0:
-                        retVal[i] = True
-                    else:
-                        retVal[i] = False
-
-                # call ray casting algorithm
-                elif 'rc' in method:
-                    rc = self.rayCrossing(self.__points[i, :])
-                    if rc % 2 == 0:
-                        retVal[i] = False
-                    else:
-                        retVal[i] = True
-
-                # zip - need to be true on inside OR vertex OR boundary
-                if "+" in method:
-                    retVal[i] = any([retVal[i], self.onLine(self.__points[i, :]),
-                                    self.onVertex(self.__points[i, :])])
-
-        # convert back to boolean
-        retVal = [bool(val) for val in retVal]
+        if out is not None:
+            np.copyto(out, retVal, casting='unsafe')
+            return out
         return retVal
 
-    def viewPIP(self, method='w+', save=False):
+    def reclassify(self, inside, change, method='w+', index=None):
+        """
+        Updates earlier pointInPolygon results after the polygon has been edited, testing only the points whose
+        status could have changed; see PreparedPolygon.reclassify.
+
+        :param inside: (np.ndarray) results of pointInPolygon from before the edit; updated in place
+        :param change: (tuple) as returned by Polygon.addPoint / moveVertex or the PreparedPolygon equivalents
+        :param method: (str) method the results were computed with, see pointInPolygon.
+        :param index: (str) edge index to use, see pointInPolygon; default chosen for the workload.
+        :return: (np.ndarray) inside.
+        """
+        self.__prepared.reclassify(self.__points, inside, change, method=method, index=index)
+        return inside
+
+    def insideIndices(self, method='w+', index=None, workers=None, backend=None):
+        """
+        Indices of the points inside the polygon, see pointInPolygon.
+
+        :return: (np.ndarray) int indices into the points, in increasing order.
+        """
+        return np.flatnonzero(self.pointInPolygon(method=method, index=index, workers=workers, backend=backend))
+
+    def countInside(self, method='w+', index=None, workers=None, backend=None):
+        """
+        Number of points inside the polygon, see pointInPolygon.
+
+        :return: (int) number of points inside.
+        """
+        return int(np.count_nonzero(self.pointInPolygon(method=method, index=index, workers=workers,
+                                                        backend=backend)))
+
+    def viewPIP(self, method='w+', save=False, inside=None):
         """
         Function to plot point, polygon and visualize results in interactive web session.
         Option to save as HTML with name "PIP_visualization_{methodname}.html".
@@ -509,10 +3002,12 @@ class PIP(object):
                         'rc+' - ray casting algorithm PLUS any points on lines/vertices
         :param save: (bool) true to enable saving; default false.
                         True saves image in code location folder as "PIP_visualization_{methodname}.html".
+        :param inside: (np.ndarray) results of pointInPolygon already computed for these points, to plot them
+                        without testing again; default None runs pointInPolygon.
         :return: none; opens web session, hit ctrl-c to exit.
         """
         # run PIP
-        inOut = self.pointInPolygon(method=method)
+        inOut = self.pointInPolygon(method=method) if inside is None else np.asarray(inside, dtype=bool)
 
         # colors drawn from
         outcolor = "#fd4659" # watermelon
@@ -523,36 +3018,37 @@ class PIP(object):
         fig.subplots_adjust(right=0.8)
 
         # add polygon to image
-        poly = Pgon((self.__polygon[:, [0, 1]]),
-                    alpha=0.7,
-                    facecolor="grey",
-                    edgecolor='none',
-                    label="Polygon")
+        starts = self.__prepared.rings
+        if len(starts) > 1:
+            # one path with a closed sub-path per ring, so that holes are left unfilled
+            ends = np.append(starts[1:], self.polygon.shape[0])
+            vertices, codes = [], []
+            for start, end in zip(starts, ends):
+                vertices += [self.polygon[start:end, [0, 1]], self.polygon[start:start + 1, [0, 1]]]
+                codes += [Path.MOVETO] + [Path.LINETO] * (end - start - 1) + [Path.CLOSEPOLY]
+            poly = PathPatch(Path(np.vstack(vertices), codes),
+                             alpha=0.7,
+                             facecolor="grey",
+                             edgecolor='none',
+                             label="Polygon")
+        else:
+            poly = Pgon((self.polygon[:, [0, 1]]),
+                        alpha=0.7,
+                        facecolor="grey",
+                        edgecolor='none',
+                        label="Polygon")
         ax.add_patch(poly)
 
         # collection of all plotted objects
         plotted_objects = [poly]
 
-        # break into yes and no point lists
-        outPts = np.empty([0, 3])
-        inPts = np.empty([0, 3])
-
-        # creator for tooltip labels
-        outLabel = []
-        inLabel = []
-
         # break into inpoints/outpoints collections, with appropriate labels in html
-        for i in range(len(inOut)):
-            if inOut[i]:
-                inPts = np.vstack([inPts,self.__points[i, :]])
-                inLabel.append('<p style="color:'+incolor+
-                               ';"><i>Inside</i> <br> Pt {0}: ({1:.0f}, {2:.0f})</p>'.format(i + 1, self.__points[i, 0],
-                                                                                             self.__points[i, 1]))
-            else:
-                outPts = np.vstack([outPts,self.__points[i, :]])
-                outLabel.append('<p style="color:'+outcolor+
-                                ';"><i>Outside</i> <br> Pt {0}: ({1:.0f}, {2:.0f})</p>'.format(i + 1, self.__points[i, 0],
-                                                                                               self.__points[i, 1]))
+        inIds, outIds = np.flatnonzero(inOut), np.flatnonzero(~inOut)
+        inPts, outPts = self.__points[inIds], self.__points[outIds]
+        inLabel = ['<p style="color:' + incolor + ';"><i>Inside</i> <br> Pt {0}: ({1:.0f}, {2:.0f})</p>'.format(
+            i + 1, self.__points[i, 0], self.__points[i, 1]) for i in inIds]
+        outLabel = ['<p style="color:' + outcolor + ';"><i>Outside</i> <br> Pt {0}: ({1:.0f}, {2:.0f})</p>'.format(
+            i + 1, self.__points[i, 0], self.__points[i, 1]) for i in outIds]
         # scatterplot for points outside
         outScat = ax.scatter(outPts[:, 0],
                              outPts[:, 1],
@@ -601,8 +3097,8 @@ class PIP(object):
         # add title
         ax.set_title(title, size=20)
         # add method information as text
-        ax.text(min(min(self.__polygon[:, 0]), min(self.__points[:, 0])) - 0.5,
-                min(min(self.__polygon[:, 1]), min(self.__points[:, 1])) - 0.5,
+        ax.text(min(min(self.polygon[:, 0]), min(self.__points[:, 0])) - 0.5,
+                min(min(self.polygon[:, 1]), min(self.__points[:, 1])) - 0.5,
                 method_text, size=10, style='italic')
         ax.grid(color='white', linestyle='solid')
         ax.set_xlabel("x position")
@@ -627,51 +3123,229 @@ class PIP(object):
         pass
 
 
+class BoxTree(object):
+    """
+    Sort-Tile-Recursive (STR) packed R-tree over a set of boxes, queried for all points at once by walking
+    the tree level by level.  See PolygonTree (boxes of polygons) and PreparedPolygon.edgeTree (boxes of edges).
+    """
+    @_timed('index')
+    def __init__(self, boxes, nodeSize=TREE_NODE_SIZE):
+        """
+        Initialization function; bulk loads the tree.
+
+        :param boxes: (np.ndarray) [n,4] boxes as xmin, ymin, xmax, ymax
+        :param nodeSize: (int) maximum number of children of each node
+        """
+        self.nodeSize = nodeSize
+        # leaf entries are the boxes themselves, in packed order
+        order = self.packOrder(boxes)
+        self.items = order
+        level = boxes[order]
+        # each level holds its entry boxes and the [start, start + count) range of each entry's children in the
+        # level below (none for the leaves); levels are built upwards until they fit in a single root node
+        self.levels = [(level, None, None)]
+        while level.shape[0] > nodeSize:
+            starts = np.arange(0, level.shape[0], nodeSize)
+            counts = np.minimum(nodeSize, level.shape[0] - starts)
+            nodes = np.column_stack([np.minimum.reduceat(level[:, 0], starts), np.minimum.reduceat(level[:, 1], starts),
+                                     np.maximum.reduceat(level[:, 2], starts), np.maximum.reduceat(level[:, 3], starts)])
+            # pack the new nodes in turn, keeping each node's children range with it
+            order = self.packOrder(nodes)
+            level = nodes[order]
+            self.levels.append((level, starts[order], counts[order]))
+        # query from the root down
+        self.levels.reverse()
+
+    def packOrder(self, boxes):
+        """
+        STR packing order of a set of boxes: sort by centre x into vertical slices, then by centre y within
+        each slice, so that consecutive runs of nodeSize boxes are spatially compact.
+
+        :param boxes: (np.ndarray) [n,4] boxes as xmin, ymin, xmax, ymax
+        :return: (np.ndarray) int permutation of the boxes.
+        """
+        numBoxes = boxes.shape[0]
+        numSlices = max(1, int(np.ceil(np.sqrt(np.ceil(numBoxes / float(self.nodeSize))))))
+        sliceSize = numSlices * self.nodeSize
+        centreX = boxes[:, 0] + boxes[:, 2]
+        centreY = boxes[:, 1] + boxes[:, 3]
+        byX = np.argsort(centreX, kind='stable')
+        # slice number of every box, then sort by (slice, centre y)
+        slices = np.empty(numBoxes, dtype=int)
+        slices[byX] = np.arange(numBoxes) // sliceSize
+        return np.lexsort((centreY, slices))
+
+    def nearest(self, pts, distance, maxPairs=None):
+        """
+        Smallest distance from each point to any item of the tree, by branch and bound: at every level an
+        entry is dropped if its box is farther from the point than the farthest corner of the point's
+        nearest box, since that box holds at least one item within that distance.  A batch of points whose
+        entries would expand to more than maxPairs children is split in two and each half continued
+        separately, so memory stays bounded however much the boxes overlap.
+
+        :param pts: (np.ndarray) coordinates of points [n,2] or [n,3]
+        :param distance: (function) of (point indices, item indices) returning the distance of each pair
+        :param maxPairs: (int) largest number of (point, entry) pairs to expand at once; default None fits
+                        CHUNK_BYTES.
+        :return: (np.ndarray) float smallest distance of each point.
+        """
+        if maxPairs is None:
+            maxPairs = max(1, CHUNK_BYTES // PAIR_BYTES)
+        dist = np.empty(pts.shape[0])
+        top = self.levels[0][0].shape[0]
+        for start in range(0, pts.shape[0], TREE_QUERY_POINTS):
+            numPts = min(TREE_QUERY_POINTS, pts.shape[0] - start)
+            work = [(np.repeat(np.arange(start, start + numPts), top), np.tile(np.arange(top), numPts), 0)]
+            while work:
+                ptIds, entries, depth = work.pop()
+                boxes, starts, counts = self.levels[depth]
+                # pairs stay grouped by point, so per point bounds are reductions over runs
+                runs = np.flatnonzero(np.diff(ptIds, prepend=-1))
+                x, y, box = pts[ptIds, 0], pts[ptIds, 1], boxes[entries]
+                # nearest and farthest distance from the point to each box
+                near = np.hypot(np.maximum(np.maximum(box[:, 0] - x, x - box[:, 2]), 0),
+                                np.maximum(np.maximum(box[:, 1] - y, y - box[:, 3]), 0))
+                far = np.hypot(np.maximum(x - box[:, 0], box[:, 2] - x), np.maximum(y - box[:, 1], box[:, 3] - y))
+                bound = np.minimum.reduceat(far, runs)
+                keep = near <= np.repeat(bound, np.diff(np.append(runs, ptIds.shape[0])))
+                ptIds, entries = ptIds[keep], entries[keep]
+                runs = np.flatnonzero(np.diff(ptIds, prepend=-1))
+                if starts is None:
+                    # exact distance to the remaining items
+                    dist[ptIds[runs]] = np.minimum.reduceat(distance(ptIds, self.items[entries]), runs)
+                elif counts[entries].sum() > maxPairs and runs.shape[0] > 1:
+                    # too many children at once: split the points in two
+                    split = runs[runs.shape[0] // 2]
+                    work.append((ptIds[split:], entries[split:], depth))
+                    work.append((ptIds[:split], entries[:split], depth))
+                else:
+                    # descend to the children of the remaining entries
+                    owner, entries = expandRanges(starts[entries], counts[entries])
+                    work.append((ptIds[owner], entries, depth + 1))
+        return dist
+
+
+class PolygonTree(BoxTree):
+    """
+    Sort-Tile-Recursive (STR) packed R-tree over the bounding boxes of many polygons, for joining large point
+    sets to large polygon sets.  Candidate (point, polygon) pairs are found for all points at once by walking
+    the tree level by level, and the exact point in polygon test is then only run on those candidates.
+    """
+    def __init__(self, polygons, nodeSize=TREE_NODE_SIZE):
+        """
+        Initialization function; bulk loads the tree.
+
+        :param polygons: (list of Polygon) polygons to index
+        :param nodeSize: (int) maximum number of children of each node
+        """
+        self.polygons = list(polygons)
+        # polygon bounding boxes as xmin, ymin, xmax, ymax
+        boxes = np.empty([len(self.polygons), 4])
+        for i, polygon in enumerate(self.polygons):
+            bbox = polygon.getBoundingBox()
+            boxes[i] = [bbox[0, 0], bbox[0, 1], bbox[2, 0], bbox[2, 1]]
+        BoxTree.__init__(self, boxes, nodeSize)
+
+    def candidates(self, pts):
+        """
+        Candidate (point, polygon) pairs: every point paired with every polygon whose bounding box contains it.
+
+        :param pts: (np.ndarray) coordinates of points [n,2] or [n,3]
+        :return: (np.ndarray) [k,2] int array of (point index, polygon index) pairs.
+        """
+        pairs = []
+        for start in range(0, pts.shape[0], TREE_QUERY_POINTS):
+            px = pts[start:start + TREE_QUERY_POINTS, 0]
+            py = pts[start:start + TREE_QUERY_POINTS, 1]
+            # start with every point against every entry of the top level
+            top = self.levels[0][0].shape[0]
+            ptIds = np.repeat(np.arange(px.shape[0]), top)
+            entries = np.tile(np.arange(top), px.shape[0])
+            for boxes, starts, counts in self.levels:
+                # keep pairs whose box contains the point
+                keep = ((boxes[entries, 0] <= px[ptIds]) & (px[ptIds] <= boxes[entries, 2]) &
+                        (boxes[entries, 1] <= py[ptIds]) & (py[ptIds] <= boxes[entries, 3]))
+                ptIds, entries = ptIds[keep], entries[keep]
+                if starts is not None:
+                    # descend to the children of the remaining entries
+                    owner, entries = expandRanges(starts[entries], counts[entries])
+                    ptIds = ptIds[owner]
+            pairs.append(np.column_stack([ptIds + start, self.items[entries]]))
+        if not pairs:
+            return np.empty([0, 2], dtype=int)
+        return np.vstack(pairs)
+
+    def join(self, points, method='w+', index=None):
+        """
+        Spatial join of points to polygons: the exact point in polygon test is run for the candidate pairs of
+        each polygon in one batch, against its cached PreparedPolygon.
+
+        :param points: (np.ndarray, Line) point coordinates [n,2] or [n,3], or a geometry holding them
+        :param method: (str) method of computing point in polygon, see PIP.pointInPolygon.
+        :param index: (str) edge index to use for each polygon, see PIP.pointInPolygon.
+        :return: (np.ndarray) [k,2] int array of (point index, polygon index) pairs, sorted by point then polygon.
+        """
+        pts = points.coords if isinstance(points, Geom) else points
+        pairs = self.candidates(pts)
+        # group candidates by polygon and test each group at once
+        pairs = pairs[np.argsort(pairs[:, 1], kind='stable')]
+        splits = np.flatnonzero(np.diff(pairs[:, 1])) + 1
+        keep = np.zeros(pairs.shape[0], dtype=bool)
+        for group in np.split(np.arange(pairs.shape[0]), splits):
+            if group.shape[0]:
+                prepared = self.polygons[pairs[group[0], 1]].prepare()
+                keep[group] = prepared.pointInPolygon(pts[pairs[group, 0]], method, index=index)
+        pairs = pairs[keep]
+        return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+
 # Example Usage (Supplied with Coursework)
+# (only run as a script, so that the classes can be imported, e.g. by process pool workers)
 
-p1 = Point(1,2) # Create some points
-p2 = Point(2,3)
-p3 = Point(4,5)
+if __name__ == '__main__':
+    p1 = Point(1,2) # Create some points
+    p2 = Point(2,3)
+    p3 = Point(4,5)
 
-p1.x
-p1.x = 10       # Change the x coordinate of a point
-p1.x
+    p1.x
+    p1.x = 10       # Change the x coordinate of a point
+    p1.x
 
-l1 = Line([p1.coords, p2.coords, p3.coords])  # Create a line using the points coordinates
-l1.coords
-pg1 = Polygon([p1.coords, p2.coords, p3.coords]) # Create a polygon using the point coords
-pg1.coords
-pg2 = Polygon([l1.coords])                    # Create a polygon using the line coordinates
-pg2.coords
+    l1 = Line([p1.coords, p2.coords, p3.coords])  # Create a line using the points coordinates
+    l1.coords
+    pg1 = Polygon([p1.coords, p2.coords, p3.coords]) # Create a polygon using the point coords
+    pg1.coords
+    pg2 = Polygon([l1.coords])                    # Create a polygon using the line coordinates
+    pg2.coords
 
-p4 = Point(6,7)                               # Add a point to a line
-l1.addPoint(p4.coords)
-l1.coords
+    p4 = Point(6,7)                               # Add a point to a line
+    l1.addPoint(p4.coords)
+    l1.coords
 
-pg2.addPoint(Point(8,9).coords)               # Add a point to a polygon
+    pg2.addPoint(Point(8,9).coords)               # Add a point to a polygon
 
-p1.addPoint(p4.coords)                        # Try to add a point to a point
+    p1.addPoint(p4.coords)                        # Try to add a point to a point
 
-p1.getStartPoint()                            # Return start and end points of points, lines and polygons
-p1.getEndPoint()
-l1.getStartPoint()
-l1.getEndPoint()
+    p1.getStartPoint()                            # Return start and end points of points, lines and polygons
+    p1.getEndPoint()
+    l1.getStartPoint()
+    l1.getEndPoint()
 
 
-# Example of PIP Usage
+    # Example of PIP Usage
 
-# read in test polygon from file (relative to code location)
-testPoly = "testData/testPoly.csv"
-pg3 = Polygon(testPoly)
+    # read in test polygon from file (relative to code location)
+    testPoly = "testData/testPoly.csv"
+    pg3 = Polygon(testPoly)
 
-# read in test points into line object from file (relative to code location)
-testPoints = "testData/testPoints.csv"
-l4 = Line(testPoints)
+    # read in test points into line object from file (relative to code location)
+    testPoints = "testData/testPoints.csv"
+    l4 = Line(testPoints)
 
-# run only one of the following at a time
-# plot is interactive - click to turn on/off each category of points
-# use tools in the bottom left to zoom, pan, and reset
-# see if polygon contains all points within "line", must view in web browser or open HTML
-pg3.contains(l4, method='rc+', plot=True, save=True)
-# see if all vertices on line are within polygon, must view in web browser or open HTML
-# l4.isInside(pg3, plot=True, method='w+', save=True)
+    # run only one of the following at a time
+    # plot is interactive - click to turn on/off each category of points
+    # use tools in the bottom left to zoom, pan, and reset
+    # see if polygon contains all points within "line", must view in web browser or open HTML
+    pg3.contains(l4, method='rc+', plot=True, save=True)
+    # see if all vertices on line are within polygon, must view in web browser or open HTML
+    # l4.isInside(pg3, plot=True, method='w+', save=True)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+"""
+Benchmarks for the point in polygon code in Hurst_GISPT.
+
+Generates convex, star, spiral and comb polygons and random point sets over their bounding boxes, including
+points on edges, at vertices and level with vertices, times every point in polygon method with every backend,
+and records throughput and peak memory (tracemalloc).
+Results can be saved as a JSON baseline and later runs compared against it; any case that is slower or uses
+more memory than the baseline by more than the tolerance is reported and the script exits with status 1.
+Every backend is also checked against the vectorized results, so a fast but wrong change fails as well.
+
+Examples:
+    python benchmark.py --save baseline.json            # quick sizes, store as baseline
+    python benchmark.py --compare baseline.json         # rerun and fail on regressions
+    python benchmark.py --full --kinds comb spiral      # 10 to 1M vertices, 1k to 10M points
+
+Backends that test every edge for every point ('scalar', 'vectorized') are skipped for cases with more
+point/edge pairs than MAX_PAIRS allows them, so that the full run finishes.
+"""
+
+import argparse  # command line options
+import json  # baselines
+import sys  # exit status
+import time  # timing
+import tracemalloc  # peak memory
+
+import numpy as np
+
+import Hurst_GISPT as gis
+
+# default (quick) and full problem sizes
+QUICK_VERTICES = [10, 1000, 100000]
+QUICK_POINTS = [1000, 100000]
+FULL_VERTICES = [10, 100, 1000, 10000, 100000, 1000000]
+FULL_POINTS = [1000, 10000, 100000, 1000000, 10000000]
+METHODS = ['w', 'w+', 'rc', 'rc+', 'ol', 'ov', 'lv']
+# largest number of point/edge pairs run through the backends that test every edge for every point
+MAX_PAIRS = {'scalar': 1e5, 'vectorized': 2e9}
+# relative slow-down (or memory growth) over the baseline that counts as a regression
+TOLERANCE = 0.25
+# cases faster (seconds) or smaller (bytes) than this are too noisy to flag as regressions
+MIN_SECONDS = 0.01
+MIN_BYTES = 2**20
+
+
+def convexPolygon(numVerts):
+    """
+    Regular polygon (convex) with the given number of vertices.
+
+    :param numVerts: (int) number of vertices
+    :return: (np.ndarray) vertex coordinates [n,2]
+    """
+    angle = np.linspace(0, 2 * np.pi, numVerts, endpoint=False)
+    return np.column_stack([np.cos(angle), np.sin(angle)]) * 100
+
+
+def starPolygon(numVerts, seed=0):
+    """
+    Star shaped polygon: vertices at increasing angles and random radii, so the boundary zig-zags in and out.
+
+    :param numVerts: (int) number of vertices
+    :param seed: (int) random seed
+    :return: (np.ndarray) vertex coordinates [n,2]
+    """
+    rng = np.random.RandomState(seed)
+    angle = np.linspace(0, 2 * np.pi, numVerts, endpoint=False)
+    radius = rng.uniform(30, 100, numVerts)
+    return np.column_stack([radius * np.cos(angle), radius * np.sin(angle)])
+
+
+def spiralPolygon(numVerts, turns=5):
+    """
+    Spiral arm of constant width: out along one spiral and back along a second, inner one.  Every horizontal
+    line through it crosses many edges, which is the worst case for ray based tests.
+
+    :param numVerts: (int) number of vertices (rounded down to even)
+    :param turns: (int) number of turns of the spiral
+    :return: (np.ndarray) vertex coordinates [n,2]
+    """
+    half = max(numVerts // 2, 3)
+    angle = np.linspace(0, 2 * np.pi * turns, half)
+    # radius grows by 10 per turn; the arm is 6 wide
+    outer = 10 + 10 * angle / (2 * np.pi)
+    inner = outer - 6
+    out = np.column_stack([outer * np.cos(angle), outer * np.sin(angle)])
+    back = np.column_stack([inner * np.cos(angle), inner * np.sin(angle)])[::-1]
+    return np.vstack([out, back])
+
+
+def combPolygon(numVerts):
+    """
+    Comb: a bar along the bottom with thin teeth pointing up, four vertices per tooth.  Many edges share
+    each y value, and most of the bounding box lies between teeth.
+
+    :param numVerts: (int) number of vertices (rounded down to a multiple of 4, at least one tooth)
+    :return: (np.ndarray) vertex coordinates [n,2]
+    """
+    numTeeth = max(numVerts // 4 - 1, 1)
+    x = np.arange(numTeeth, dtype=float)
+    # each tooth: up the left side, across the top, down the right side, along the bar to the next tooth
+    teeth = np.column_stack([np.repeat(x, 4) + np.tile([0, 0, 0.5, 0.5], numTeeth),
+                             np.tile([10, 100, 100, 10], numTeeth)])
+    # close along the bottom of the bar
+    bar = np.array([[numTeeth, 10], [numTeeth, 0], [0, 0]], dtype=float)
+    return np.vstack([teeth[1:], bar, teeth[:1]])
+
+
+POLYGONS = {'convex': convexPolygon, 'star': starPolygon, 'spiral': spiralPolygon, 'comb': combPolygon}
+
+
+def randomPoints(numPts, poly, seed=1):
+    """
+    Random points for a polygon: mostly uniform over its bounding box, padded by 5% each side, with the rest
+    on or near the boundary, where backends are most likely to disagree (one in ten each at random positions
+    along edges and at edge midpoints, one in twenty each at vertices and at random x level with a vertex).
+
+    :param numPts: (int) number of points
+    :param poly: (np.ndarray) polygon vertex coordinates [n,2]
+    :param seed: (int) random seed
+    :return: (np.ndarray) point coordinates [n,2]
+    """
+    rng = np.random.RandomState(seed)
+    low, high = poly.min(axis=0), poly.max(axis=0)
+    pad = 0.05 * (high - low)
+    numEdge, numVertex = numPts // 10, numPts // 20
+    numUniform = numPts - 2 * numEdge - 2 * numVertex
+    # edges from each vertex to the next
+    start = rng.randint(0, poly.shape[0], 2 * numEdge)
+    vector = np.roll(poly, -1, axis=0)[start] - poly[start]
+    along = np.concatenate([rng.uniform(0, 1, numEdge), np.full(numEdge, 0.5)])
+    level = np.column_stack([rng.uniform(low[0] - pad[0], high[0] + pad[0], numVertex),
+                             poly[rng.randint(0, poly.shape[0], numVertex), 1]])
+    pts = np.vstack([rng.uniform(low - pad, high + pad, (numUniform, 2)),
+                     poly[start] + along[:, np.newaxis] * vector,
+                     poly[rng.randint(0, poly.shape[0], numVertex)],
+                     level])
+    return pts[rng.permutation(numPts)]
+
+
+def measure(function, repeats):
+    """
+    Peak traced memory (tracemalloc) of a function from one run, then its best wall-clock time over several
+    untraced runs.  Tracing slows allocation-heavy code unevenly, so it is kept out of the timings; the traced
+    run also serves to warm up.
+
+    :param function: (function) of no arguments
+    :param repeats: (int) number of timed runs
+    :return: (tuple) seconds, peak bytes, return value of the last run.
+    """
+    tracemalloc.start()
+    try:
+        result = function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, peak, result
+
+
+def runBenchmarks(kinds, vertexCounts, pointCounts, methods, backends, repeats=3):
+    """
+    Times every combination of polygon kind, size, point count, method and backend.  Each polygon is prepared
+    afresh for each backend, so index build times are included.
+
+    :param kinds: (list of str) polygon kinds, keys of POLYGONS
+    :param vertexCounts: (list of int) polygon sizes
+    :param pointCounts: (list of int) point set sizes
+    :param methods: (list of str) point in polygon methods, see PIP.pointInPolygon
+    :param backends: (list of str) backends, see BACKENDS
+    :param repeats: (int) runs per case; the fastest is kept
+    :return: (tuple) dict of results by case name, list of cases whose results differed between backends.
+    """
+    results, wrong = {}, []
+    for kind in kinds:
+        for numVerts in vertexCounts:
+            poly = POLYGONS[kind](numVerts)
+            convex = gis.PreparedPolygon(poly).convex
+            for numPts in pointCounts:
+                pts = randomPoints(numPts, poly)
+                for method in methods:
+                    reference = None
+                    for backend in backends:
+                        name = '{0}/{1}/{2}/{3}/{4}'.format(kind, numVerts, numPts, method, backend)
+                        if numPts * poly.shape[0] > MAX_PAIRS.get(backend, float('inf')):
+                            continue
+                        # the convex backend only accepts convex polygons
+                        if backend == 'convex' and not convex:
+                            continue
+                        seconds, peak, inside = measure(
+                            lambda: gis.runBackend(gis.PreparedPolygon(poly), pts, method, backend), repeats)
+                        results[name] = {'seconds': seconds,
+                                         'pointsPerSecond': numPts / seconds if seconds > 0 else float('inf'),
+                                         'peakBytes': peak,
+                                         'inside': int(np.count_nonzero(inside))}
+                        print('{0:<45} {1:10.4f} s {2:14.0f} pts/s {3:10.1f} MB'.format(
+                            name, seconds, results[name]['pointsPerSecond'], peak / 2.0**20))
+                        # all backends must agree with the first one run
+                        if reference is None:
+                            reference = inside
+                        elif not np.array_equal(reference, inside):
+                            wrong.append(name)
+    return results, wrong
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    Compares results against a baseline.
+
+    :param results: (dict) results by case name, see runBenchmarks
+    :param baseline: (dict) baseline results by case name
+    :param tolerance: (float) allowed relative increase in time and peak memory
+    :return: (list of str) description of each regression.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        if result['inside'] != base['inside']:
+            regressions.append('{0}: {1} points inside, baseline {2}'.format(name, result['inside'], base['inside']))
+        if result['seconds'] > max(base['seconds'], MIN_SECONDS) * (1 + tolerance):
+            regressions.append('{0}: {1:.4f} s, baseline {2:.4f} s'.format(name, result['seconds'], base['seconds']))
+        if result['peakBytes'] > max(base['peakBytes'], MIN_BYTES) * (1 + tolerance):
+            regressions.append('{0}: peak {1} bytes, baseline {2} bytes'.format(name, result['peakBytes'],
+                                                                              base['peakBytes']))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Point in polygon benchmarks.")
+    parser.add_argument('--full', action='store_true', help="10 to 1M vertices and 1k to 10M points")
+    parser.add_argument('--kinds', nargs='+', default=sorted(POLYGONS), choices=sorted(POLYGONS))
+    parser.add_argument('--vertices', nargs='+', type=int, help="polygon sizes (overrides --full)")
+    parser.add_argument('--points', nargs='+', type=int, help="point set sizes (overrides --full)")
+    parser.add_argument('--methods', nargs='+', default=METHODS, choices=METHODS)
+    parser.add_argument('--backends', nargs='+', default=sorted(gis.BACKENDS), choices=sorted(gis.BACKENDS))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--save', help="write results to this JSON baseline")
+    parser.add_argument('--compare', help="JSON baseline to compare against")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    vertexCounts = args.vertices or (FULL_VERTICES if args.full else QUICK_VERTICES)
+    pointCounts = args.points or (FULL_POINTS if args.full else QUICK_POINTS)
+    results, wrong = runBenchmarks(args.kinds, vertexCounts, pointCounts, args.methods, args.backends,
+                                   args.repeats)
+
+    if args.save:
+        with open(args.save, 'w') as outFile:
+            json.dump(results, outFile, indent=1, sort_keys=True)
+
+    failures = ['{0}: result differs from other backends'.format(name) for name in wrong]
+    if args.compare:
+        with open(args.compare) as inFile:
+            failures += compare(results, json.load(inFile), args.tolerance)
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print("  " + failure)
+        sys.exit(1)
@@ -0,0 +1,479 @@
+import os
+import tempfile
+import numpy as np
+from unittest import TestCase, main
+import Hurst_GISPT as gis
+from Hurst_GISPT import loadCSV, saveGeometries, loadGeometries, Geom, Point, Line, Polygon, PointCollection
+from Hurst_GISPT import PIP, PreparedPolygon
+
+METHODS = ['w', 'w+', 'rc', 'rc+', 'ol', 'ov', 'lv']
+
+
+def testPolygons():
+    """
+    Small polygons with integer vertices, by name: (vertex coordinates, ring starts).  Between them they have
+    holes, separate parts, concave bays, horizontal and vertical edges, a collinear vertex, a convex shape
+    and a self-intersecting star (where the winding and ray casting rules differ).
+    """
+    return {'square with hole': (np.array([[0, 0], [8, 0], [8, 8], [0, 8], [2, 2], [2, 5], [5, 5], [5, 2.]]),
+                                 [0, 4]),
+            'two parts': (np.array([[0, 0], [4, 0], [4, 4], [0, 4], [6, 0], [10, 0], [8, 4.]]), [0, 4]),
+            'comb': (np.array([[0, 0], [6, 0], [6, 6], [4, 6], [4, 2], [2, 2], [2, 6], [0, 6.]]), None),
+            'hexagon': (np.array([[2, 0], [6, 0], [8, 3], [6, 6], [2, 6], [0, 3.]]), None),
+            'collinear triangle': (np.array([[0, 0], [4, 0], [8, 0], [4, 6.]]), None),
+            'star': (np.array([[0, 3], [8, 3], [1, -2], [4, 7], [7, -2.]]), None)}
+
+
+def testPoints(coords, rings=None):
+    """
+    Points for differential tests: a half-unit grid over the padded bounding box (so many points lie on edges,
+    at vertices or level with them), the vertices, and points a half and a third of the way along every edge.
+    """
+    low, high = coords.min(axis=0) - 1, coords.max(axis=0) + 1
+    x, y = np.meshgrid(np.arange(low[0], high[0] + 0.5, 0.5), np.arange(low[1], high[1] + 0.5, 0.5))
+    following = PreparedPolygon(coords, rings).following
+    along = [coords + t * (coords[following] - coords) for t in (0.5, 1 / 3.0)]
+    return np.vstack([np.column_stack([x.ravel(), y.ravel()]), coords] + along)
+
+
+class TestLoadCSV(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for name in os.listdir(self.dir):
+            os.remove(os.path.join(self.dir, name))
+        os.rmdir(self.dir)
+
+    def load(self, text, **kwargs):
+        path = os.path.join(self.dir, 'points.csv')
+        with open(path, 'w') as csvFile:
+            csvFile.write(text)
+        return loadCSV(path, **kwargs)
+
+    def test_signed_decimal(self):
+        coords, rejected = self.load("x,y\n-1.5,2.25\n3,-4e-1\n+0.5,.75\n")
+        self.assertTrue(np.array_equal(coords[:, :2], [[-1.5, 2.25], [3, -0.4], [0.5, 0.75]]))
+        self.assertTrue(np.isnan(coords[:, 2]).all())
+        self.assertEqual(rejected.shape[0], 0)
+
+    def test_large_block(self):
+        # enough rows to be parsed in bulk, with negative values throughout
+        values = np.arange(-500, 500).reshape(-1, 2) / 8.0
+        coords, rejected = self.load("\n".join("{0},{1}".format(x, y) for x, y in values))
+        self.assertTrue(np.array_equal(coords[:, :2], values))
+        self.assertEqual(rejected.shape[0], 0)
+
+    def test_bad_rows(self):
+        rows = ["{0},{1}".format(i, -i) for i in range(200)]
+        rows[50] = "1,abc"
+        rows[120] = "7"
+        coords, rejected = self.load("x,y\n" + "\n".join(rows))
+        self.assertEqual(coords.shape[0], 198)
+        self.assertEqual(list(rejected), [52, 122])
+
+    def test_bad_first_row(self):
+        # partly numeric first line is a bad row, not a header
+        coords, rejected = self.load("1,abc\n2,3\n")
+        self.assertTrue(np.array_equal(coords[:, :2], [[2, 3]]))
+        self.assertEqual(list(rejected), [1])
+
+    def test_quoted(self):
+        coords, rejected = self.load('"x","y"\n"1","-2"\n"3.5","4"\n')
+        self.assertTrue(np.array_equal(coords[:, :2], [[1, -2], [3.5, 4]]))
+        self.assertEqual(rejected.shape[0], 0)
+        # and in bulk
+        coords, rejected = self.load("\n".join('"{0}","-{0}.5"'.format(i) for i in range(200)))
+        self.assertTrue(np.array_equal(coords[:, 1], -np.arange(200) - 0.5))
+        self.assertEqual(rejected.shape[0], 0)
+
+    def test_z(self):
+        coords, rejected = self.load("x,y,z\n1,2,-3\n4,5,6.5\n", z=2)
+        self.assertTrue(np.array_equal(coords, [[1, 2, -3], [4, 5, 6.5]]))
+
+
+class TestGeometryFile(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'geoms.geo')
+
+    def tearDown(self):
+        for name in os.listdir(self.dir):
+            os.remove(os.path.join(self.dir, name))
+        os.rmdir(self.dir)
+
+    def roundTrip(self, geoms):
+        saveGeometries(self.path, geoms)
+        loaded = loadGeometries(self.path)
+        self.assertEqual(len(loaded), len(geoms))
+        for geom, copy in zip(geoms, loaded):
+            self.assertIs(type(copy), type(geom))
+        return loaded
+
+    def assertCoords(self, loaded, expected):
+        self.assertTrue(np.array_equal(loaded, expected, equal_nan=True))
+
+    def test_points(self):
+        loaded = self.roundTrip([Point(1, 2), Point(-3, 4.5, 6), Point(7, 8)])
+        self.assertCoords([[p.x, p.y, p.z] for p in loaded], [[1, 2, np.nan], [-3, 4.5, 6], [7, 8, np.nan]])
+
+    def test_lines(self):
+        lines = [Line(np.array([[0, 0], [1, 1], [2, 0.5]])), Line(np.array([[5, 5]])), Line(np.ones((4, 2)))]
+        for line, copy in zip(lines, self.roundTrip(lines)):
+            self.assertCoords(copy.coords, line.coords)
+
+    def test_polygons(self):
+        square = Polygon(np.array([[0, 0], [10, 0], [10, 10], [0, 10.]]))
+        square.addRing(np.array([[2, 2], [2, 4], [4, 4.]]))
+        square.addRing(np.array([[6, 6], [6, 8], [8, 8], [8, 6.]]))
+        triangle = Polygon(np.array([[20, 0], [30, 0], [25, 5.]]))
+        holed = Polygon(np.array([[0, 0], [5, 0], [5, 5], [0, 5], [1, 1], [1, 2], [2, 2.]]), rings=[0, 4])
+        polygons = [square, triangle, holed]
+        for polygon, copy in zip(polygons, self.roundTrip(polygons)):
+            self.assertCoords(copy.coords, polygon.coords)
+            self.assertEqual(list(copy.rings), list(polygon.rings))
+            for i in range(polygon.getNumRings()):
+                self.assertCoords(copy.getRing(i), polygon.getRing(i))
+        pts = PointCollection(np.random.RandomState(0).uniform(-1, 11, (500, 2)))
+        self.assertTrue(np.array_equal(loadGeometries(self.path)[0].contains(pts), square.contains(pts)))
+
+    def test_point_collections(self):
+        collections = [PointCollection(np.arange(6.).reshape(3, 2)), PointCollection(np.empty((0, 2))),
+                       PointCollection(np.ones((2, 3)))]
+        loaded = self.roundTrip(collections)
+        self.assertEqual([c.coords.shape for c in loaded], [(3, 3), (0, 3), (2, 3)])
+        self.assertCoords(loaded[0].coords[:, :2], collections[0].coords)
+        self.assertTrue(np.isnan(loaded[0].coords[:, 2]).all())
+        self.assertCoords(loaded[2].coords, collections[2].coords)
+
+    def test_mixed_columns(self):
+        lines = [Line(np.array([[0, 0], [1, 1.]])), Line(np.array([[2, 3, 4], [5, 6, 7.]]))]
+        loaded = self.roundTrip(lines)
+        self.assertCoords(loaded[0].coords, [[0, 0, np.nan], [1, 1, np.nan]])
+        self.assertCoords(loaded[1].coords, lines[1].coords)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, saveGeometries, self.path, [])
+        self.assertRaises(ValueError, saveGeometries, self.path, [Line(np.ones((2, 2))), Point(1, 1)])
+        with open(self.path, 'wb') as badFile:
+            badFile.write(b'not a geometry file')
+        self.assertRaises(ValueError, loadGeometries, self.path)
+
+    def test_edit_read_only(self):
+        polygon = Polygon(np.array([[0, 0], [10, 0], [10, 10], [0, 10.]]))
+        polygon.save(self.path)
+        copy = Geom.load(self.path)
+        self.assertRaises(ValueError, copy.coords.__setitem__, (0, 0), 1.0)
+        pts = PointCollection(np.array([[10.5, 5], [5, 11], [-0.5, 5]]))
+        copy.prepare()
+        copy.moveVertex(1, [12, 0])
+        copy.addPoint(np.array([-1, 5.]))
+        self.assertTrue(np.array_equal(copy.contains(pts, method='w'), [True, False, True]))
+        # the file is unchanged
+        self.assertCoords(Geom.load(self.path).coords, polygon.coords)
+
+
+class TestBackends(TestCase):
+    def assertBackendsAgree(self, coords, rings, pts):
+        for method in METHODS:
+            reference = PIP(pts, PreparedPolygon(coords, rings)).scalarPointInPolygon(method=method)
+            for backend in sorted(gis.BACKENDS):
+                prepared = PreparedPolygon(coords, rings)
+                if backend == 'convex' and not prepared.convex:
+                    continue
+                result = gis.runBackend(prepared, pts, method, backend)
+                self.assertTrue(np.array_equal(result, reference), (backend, method))
+            # default choice, through the Polygon
+            result = Polygon(coords, rings).contains(PointCollection(pts), method=method)
+            self.assertTrue(np.array_equal(result, reference), ('default', method))
+
+    def test_small_polygons(self):
+        for name, (coords, rings) in testPolygons().items():
+            with self.subTest(name):
+                self.assertBackendsAgree(coords, rings, testPoints(coords, rings))
+
+    def test_convex_large_coordinates(self):
+        # points on the edges of convex polygons far from the origin, where cross products round
+        rng = np.random.RandomState(0)
+        for _ in range(20):
+            angle = np.sort(rng.uniform(0, 2 * np.pi, rng.randint(3, 12)))
+            coords = np.column_stack([np.cos(angle), np.sin(angle)]) * rng.uniform(1e5, 1e6) + \
+                rng.uniform(-1e6, 1e6, 2)
+            if not PreparedPolygon(coords).convex:
+                continue
+            start = rng.randint(0, coords.shape[0], 50)
+            along = rng.uniform(0, 1, (50, 1))
+            pts = np.vstack([coords[start] + along * (np.roll(coords, -1, axis=0)[start] - coords[start]),
+                             coords, rng.uniform(coords.min(axis=0), coords.max(axis=0), (50, 2))])
+            self.assertBackendsAgree(coords, None, pts)
+
+    def test_degenerate_polygon(self):
+        # collinear vertices enclose nothing, and must not be taken as convex
+        coords = np.array([[3, 3], [0, 0], [6, 6.]])
+        self.assertFalse(PreparedPolygon(coords).convex)
+        self.assertBackendsAgree(coords, None, testPoints(coords))
+
+    def test_point_pool(self):
+        coords, rings = testPolygons()['square with hole']
+        pts = testPoints(coords, rings)
+        prepared = PreparedPolygon(coords, rings)
+        reference = PIP(pts, prepared).scalarPointInPolygon(method='w+')
+        # batches larger than the pool's buffers are split up
+        with gis.PointPool(prepared, 100, 'w+', None, 2) as pool:
+            for _ in range(2):
+                self.assertTrue(np.array_equal(pool.pointInPolygon(pts), reference))
+
+
+class TestClassify(TestCase):
+    def test_against_scalar(self):
+        # vertex and edge hits agree with onVertex / onLine, the interior with the scalar rule
+        for name, (coords, rings) in testPolygons().items():
+            pts = testPoints(coords, rings)
+            scalar = PIP(pts, PreparedPolygon(coords, rings))
+            onVertex = scalar.scalarPointInPolygon(method='ov')
+            onBoundary = scalar.scalarPointInPolygon(method='lv')
+            for method in ['w', 'rc']:
+                inside = scalar.scalarPointInPolygon(method=method + '+')
+                for index in [None, 'slab']:
+                    with self.subTest(name=name, method=method, index=index):
+                        codes = PreparedPolygon(coords, rings).classify(pts, method=method, index=index)
+                        self.assertTrue(np.array_equal(codes == gis.ON_VERTEX, onVertex))
+                        self.assertTrue(np.array_equal(codes >= gis.ON_EDGE, onBoundary))
+                        self.assertTrue(np.array_equal(codes != gis.OUTSIDE, inside))
+
+    def test_tolerance(self):
+        prepared = PreparedPolygon(testPolygons()['comb'][0])
+        pts = np.array([[3, 2.001], [3, 2.1], [0, 0], [1, 1]])
+        self.assertEqual(list(prepared.classify(pts)), [gis.OUTSIDE, gis.OUTSIDE, gis.ON_VERTEX, gis.INSIDE])
+        self.assertEqual(list(prepared.classify(pts, tol=0.01)), [gis.ON_EDGE, gis.OUTSIDE, gis.ON_VERTEX, gis.INSIDE])
+
+
+class TestReclassify(TestCase):
+    def assertReclassified(self, polygon, edit, pts, method):
+        inside = polygon.contains(PointCollection(pts), method=method)
+        change = edit(polygon)
+        self.assertIsNotNone(change)
+        PIP(pts, polygon.prepare()).reclassify(inside, change, method=method)
+        fresh = Polygon(polygon.coords.copy(), list(polygon.rings) if polygon.rings is not None else None)
+        self.assertTrue(np.array_equal(inside, fresh.contains(PointCollection(pts), method=method)))
+
+    def test_edits(self):
+        edits = {'move into bay': lambda polygon: polygon.moveVertex(4, [3, 4]),
+                 'move out': lambda polygon: polygon.moveVertex(2, [7, 7]),
+                 'move to edge': lambda polygon: polygon.moveVertex(3, [6, 3]),
+                 'append': lambda polygon: polygon.addPoint([-1, 3])}
+        for name, edit in edits.items():
+            for method in ['w+', 'w', 'rc', 'rc+']:
+                with self.subTest(name=name, method=method):
+                    coords = testPolygons()['comb'][0]
+                    self.assertReclassified(Polygon(coords), edit, testPoints(coords), method)
+
+    def test_edits_with_hole(self):
+        coords, rings = testPolygons()['square with hole']
+        for method in ['w+', 'rc']:
+            with self.subTest(method=method):
+                self.assertReclassified(Polygon(coords, rings), lambda polygon: polygon.moveVertex(6, [6, 6]),
+                                        testPoints(coords, rings), method)
+                self.assertReclassified(Polygon(coords, rings), lambda polygon: polygon.addPoint([4, 3]),
+                                        testPoints(coords, rings), method)
+
+
+class TestJoin(TestCase):
+    def test_against_brute_force(self):
+        # the test polygons laid out in overlapping rows, with points over all of them
+        polygons = []
+        for i, (coords, rings) in enumerate(testPolygons().values()):
+            for shift in [(0, 0), (3, 2)]:
+                polygons.append(Polygon(coords + [5 * i + shift[0], shift[1]], rings))
+        pts = np.vstack([testPoints(polygon.coords, polygon.rings) for polygon in polygons])
+        tree = gis.PolygonTree(polygons, nodeSize=2)
+        for method in ['w+', 'rc', 'lv']:
+            with self.subTest(method=method):
+                pairs = [(i, j) for j, polygon in enumerate(polygons)
+                         for i in np.flatnonzero(PIP(pts, polygon.prepare()).scalarPointInPolygon(method=method))]
+                expected = np.array(sorted(pairs), dtype=int).reshape(-1, 2)
+                self.assertTrue(np.array_equal(tree.join(pts, method), expected))
+                self.assertTrue(np.array_equal(tree.join(PointCollection(pts), method), expected))
+
+
+class TestDistances(TestCase):
+    def test_tree_against_all_edges(self):
+        rng = np.random.RandomState(1)
+        angle = np.linspace(0, 2 * np.pi, 400, endpoint=False)
+        radius = rng.uniform(5, 10, angle.shape[0])
+        star = np.column_stack([radius * np.cos(angle), radius * np.sin(angle)])
+        shapes = list(testPolygons().values()) + [(star, None)]
+        for coords, rings in shapes:
+            pts = np.vstack([testPoints(coords, rings), rng.uniform(-12, 12, (500, 2))])
+            for signed in [True, False]:
+                for method in ['w', 'rc']:
+                    prepared = PreparedPolygon(coords, rings)
+                    expected = prepared.distances(pts, signed=signed, method=method)
+                    result = PreparedPolygon(coords, rings).distances(pts, signed=signed, method=method, index='tree')
+                    self.assertTrue(np.allclose(result, expected, rtol=0, atol=1e-12))
+
+    def test_signs(self):
+        coords, rings = testPolygons()['square with hole']
+        pts = np.array([[1, 1], [3, 3], [-1, 4], [0, 4], [2, 2]])
+        self.assertTrue(np.allclose(Polygon(coords, rings).distances(PointCollection(pts)), [-1, 1, 1, 0, 0]))
+        self.assertTrue(np.allclose(Polygon(coords, rings).distances(PointCollection(pts), signed=False),
+                                    [1, 1, 1, 0, 0]))
+
+
+class TestContainsLines(TestCase):
+    def test_hand_cases(self):
+        polygon = Polygon(testPolygons()['comb'][0])
+        lines = [Line(np.array([[0.5, 1], [0.5, 5], [1.5, 5]])),   # within a tooth
+                 Line(np.array([[1, 5], [5, 5]])),                 # both ends inside, across the bay
+                 Line(np.array([[7, 0], [7, 6]])),                 # beside the polygon
+                 Line(np.array([[3, 3], [3, 5]])),                 # within the bay
+                 Line(np.array([[3, 3], [3, 1]])),                 # from the bay into the polygon
+                 Line(np.array([[-1, 0], [0, 0], [0, 6]]))]        # along the boundary
+        expected = [gis.LINE_CONTAINED, gis.LINE_CROSSING, gis.LINE_DISJOINT, gis.LINE_DISJOINT,
+                    gis.LINE_CROSSING, gis.LINE_CROSSING]
+        for index in [None, 'slab']:
+            self.assertEqual(list(polygon.containsLines(lines, index=index)), expected)
+        self.assertEqual(list(polygon.containsLines(lines[0])), [gis.LINE_CONTAINED])
+
+    def test_against_sampled_points(self):
+        # points sampled along each line must agree with its code; all edges and the slab index must agree
+        rng = np.random.RandomState(2)
+        for name, (coords, rings) in testPolygons().items():
+            polygon = Polygon(coords, rings)
+            pts = testPoints(coords, rings)
+            lines = [Line(pts[rng.randint(0, pts.shape[0], rng.randint(2, 5))]) for _ in range(200)]
+            samples = [np.vstack([line.coords[i] + t * (line.coords[i + 1] - line.coords[i])
+                                  for i in range(line.getNumPoints() - 1) for t in np.linspace(0, 1, 33)])
+                       for line in lines]
+            for method in ['w+', 'rc+']:
+                with self.subTest(name=name, method=method):
+                    codes = polygon.containsLines(lines, method=method)
+                    self.assertTrue(np.array_equal(codes, polygon.containsLines(lines, method=method, index='slab')))
+                    prepared = polygon.prepare()
+                    for code, sample in zip(codes, samples):
+                        inside = PIP(sample, prepared).scalarPointInPolygon(method=method)
+                        interior = PIP(sample, prepared).scalarPointInPolygon(method=method[:-1])
+                        if interior.any():
+                            self.assertNotEqual(code, gis.LINE_DISJOINT)
+                        if not inside.all():
+                            self.assertNotEqual(code, gis.LINE_CONTAINED)
+                        if interior.any() and not inside.all():
+                            self.assertEqual(code, gis.LINE_CROSSING)
+
+
+class TestResultCache(TestCase):
+    def test_hits_and_misses(self):
+        coords, rings = testPolygons()['square with hole']
+        polygon, pts = Polygon(coords, rings), PointCollection(testPoints(coords, rings))
+        expected = Polygon(coords, rings).contains(pts)
+        with gis.ResultCache() as cache:
+            first = polygon.contains(pts)
+            first[:] = False    # the cached copy must not change with the returned array
+            second = polygon.contains(pts)
+            polygon.contains(pts, method='rc')
+        self.assertTrue(np.array_equal(second, expected))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        # nothing is looked up once disabled
+        polygon.contains(pts)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_eviction(self):
+        coords, rings = testPolygons()['comb']
+        polygon, pts = Polygon(coords, rings), testPoints(coords, rings)
+        with gis.ResultCache(maxBytes=2 * pts.shape[0]) as cache:
+            for method in ['w', 'rc', 'w']:
+                polygon.contains(PointCollection(pts), method=method)
+            self.assertEqual(cache.evictions, 0)
+            self.assertEqual(cache.hits, 1)
+            polygon.contains(PointCollection(pts), method='lv')
+            self.assertEqual(cache.evictions, 1)
+            self.assertLessEqual(cache.nbytes, cache.maxBytes)
+            # 'rc' was the least recently used
+            polygon.contains(PointCollection(pts), method='rc')
+            self.assertEqual(cache.hits, 1)
+
+    def test_in_place_writes(self):
+        # writes into the coordinate arrays change the keys, so results are never stale
+        coords, rings = testPolygons()['comb']
+        polygon, pts = Polygon(coords.copy(), rings), PointCollection(testPoints(coords, rings))
+        with gis.ResultCache():
+            polygon.contains(pts)
+            polygon.coords[4] = [3, 4]
+            self.assertTrue(np.array_equal(polygon.contains(pts), Polygon(polygon.coords.copy()).contains(pts)))
+            pts.coords[:, 0] += 0.25
+            self.assertTrue(np.array_equal(polygon.contains(pts), Polygon(polygon.coords.copy()).contains(pts)))
+
+
+class TestPointCollection(TestCase):
+    def test_construction(self):
+        xy = np.arange(6.).reshape(3, 2)
+        self.assertTrue(np.array_equal(PointCollection(xy).coords, xy))
+        self.assertTrue(np.array_equal(PointCollection(x=xy[:, 0], y=xy[:, 1]).coords, xy))
+        gathered = PointCollection([Point(0, 1), Point(2, 3, 4)])
+        self.assertTrue(np.array_equal(gathered.coords, [[0, 1, np.nan], [2, 3, 4]], equal_nan=True))
+        self.assertEqual(len(PointCollection()), 0)
+        self.assertEqual(len(PointCollection([])), 0)
+        self.assertTrue(np.isnan(PointCollection(xy).z).all())
+        self.assertRaises(ValueError, PointCollection, np.ones((3, 4)))
+        self.assertRaises(ValueError, PointCollection, np.ones(3))
+
+    def test_indexing(self):
+        pts = PointCollection(np.arange(12.).reshape(4, 3))
+        self.assertEqual((pts[1].x, pts[1].y, pts[1].z), (3, 4, 5))
+        self.assertEqual(pts[-1].x, 9)
+        self.assertRaises(IndexError, pts.__getitem__, 4)
+        self.assertTrue(np.array_equal(pts[1:3].coords, pts.coords[1:3]))
+        self.assertTrue(np.array_equal(pts[pts.x > 4].coords, pts.coords[2:]))
+        self.assertTrue(np.array_equal(pts[np.array([3, 0])].coords, pts.coords[[3, 0]]))
+        self.assertEqual([point.y for point in pts], [1, 4, 7, 10])
+
+    def test_contains_matches_points(self):
+        # a collection gives the same results as the same points given one at a time
+        coords, rings = testPolygons()['square with hole']
+        polygon = Polygon(coords, rings)
+        pts = testPoints(coords, rings)
+        inside = polygon.contains(PointCollection(pts))
+        self.assertTrue(np.array_equal(inside, polygon.contains([Point(x, y) for x, y in pts])))
+        self.assertTrue(np.array_equal(inside, polygon.contains(Line(pts))))
+
+
+class TestPointView(TestCase):
+    def test_plain_point(self):
+        point = Point(1, 2)
+        self.assertTrue(np.isnan(point.z))
+        point.z = 3
+        self.assertTrue(np.array_equal(point.coords, [[1, 2, 3]]))
+        # coords is a view, so writes go through
+        point.coords[0, 0] = 5
+        self.assertEqual(point.x, 5)
+        point.y = 6
+        self.assertTrue(np.array_equal(point.coords, [[5, 6, 3]]))
+        self.assertRaises(AttributeError, setattr, point, 'w', 1)
+
+    def test_shared_row(self):
+        pts = PointCollection(np.zeros((3, 3)))
+        point = pts[1]
+        point.x, point.y, point.z = 1, 2, 3
+        self.assertTrue(np.array_equal(pts.coords[1], [1, 2, 3]))
+        pts.coords[1, 0] = 7
+        self.assertEqual(point.x, 7)
+        self.assertTrue(np.array_equal(point.coords, [[7, 2, 3]]))
+        self.assertEqual(np.count_nonzero(pts.coords[[0, 2]]), 0)
+
+    def test_two_column_view(self):
+        pts = PointCollection(np.ones((2, 2)))
+        point = Point.view(pts.coords, 0)
+        self.assertTrue(np.isnan(point.z))
+        self.assertRaises(ValueError, setattr, point, 'z', 1)
+        point.y = 4
+        self.assertEqual(pts.coords[0, 1], 4)
+
+    def test_view_isInside(self):
+        coords, rings = testPolygons()['square with hole']
+        polygon = Polygon(coords, rings)
+        pts = PointCollection(np.array([[1, 1], [3, 3], [9, 9.]]))
+        self.assertEqual([point.isInside(polygon) for point in pts], [True, False, False])
+
+
+if __name__ == '__main__':
+    main(verbosity=2)
@@ -3,6 +3,9 @@ import numpy as np
 
 class Geom(object):
     """Base geometry class from which points, lines, polygons will inherit."""
+    # lets Point use __slots__; subclasses without __slots__ still get a __dict__
+    __slots__ = ()
+
     def getStartPoint(self):
         return self.coords[0]
 
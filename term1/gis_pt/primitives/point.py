@@ -3,43 +3,69 @@ from primitives.geom import Geom
 
 
 class Point(Geom):
-    """Simple point class"""
-    # TODO documentation: https://www.jetbrains.com/help/pycharm/creating-documentation-comments.html
+    """
+    Simple point class.  Holds plain floats, or through view a row of a shared coordinate array, so that
+    creating many points does not allocate an array per point.
+    """
+    __slots__ = ('_x', '_y', '_z', '_buffer', '_row')
+
     def __init__(self, x=0.0, y=0.0, z=float('nan')):
-        self._coords = np.array([x, y, z], dtype=float)
-        self._coords.shape = (1, 3)
+        self._x, self._y, self._z = float(x), float(y), float(z)
+        self._buffer = None
+        self._row = 0
+
+    @classmethod
+    def view(cls, coords, i):
+        """
+        Point sharing its coordinates with row i of a larger array; changes through either are seen by both.
+
+        :param coords: (np.ndarray) coordinates [n,2] or [n,3]
+        :param i: (int) row of the point
+        :return: (Point) point.
+        """
+        point = cls.__new__(cls)
+        point._buffer, point._row = coords, i
+        return point
 
     @property
     def coords(self):
-        return self._coords
+        # a view of the row, so writes go through; a plain point is moved into its own [1,3] array on first use
+        if self._buffer is None:
+            self._buffer, self._row = np.array([[self._x, self._y, self._z]]), 0
+        return self._buffer[self._row:self._row + 1]
 
     def getX(self):
-        return self._coords[0, 0]
+        return self._x if self._buffer is None else self._buffer[self._row, 0]
 
     def getY(self):
-        return self._coords[0, 1]
+        return self._y if self._buffer is None else self._buffer[self._row, 1]
 
     def getZ(self):
-        return self._coords[0, 2]
+        if self._buffer is None:
+            return self._z
+        # views of [n,2] arrays have no z
+        return self._buffer[self._row, 2] if self._buffer.shape[1] > 2 else float('nan')
 
-    # @coords.setter # this doesn't work with decorator
-    def setX(self, x):
-        if type(x) == float or type(x) == int:
-            self._coords[0, 0] = float(x)
+    def _set(self, column, value):
+        if type(value) == float or type(value) == int:
+            if self._buffer is None:
+                setattr(self, ('_x', '_y', '_z')[column], float(value))
+            elif column < self._buffer.shape[1]:
+                self._buffer[self._row, column] = value
+            else:
+                raise ValueError("Cannot set z of a point viewing [n,2] coordinates.")
         else:
             raise TypeError("Coordinates must be a float or an int.")
 
+    # @coords.setter # this doesn't work with decorator
+    def setX(self, x):
+        self._set(0, x)
+
     def setY(self, y):
-        if type(y) == float or type(y) == int:
-            self._coords[0, 1] = float(y)
-        else:
-            raise TypeError("Coordinates must be a float or an int.")
+        self._set(1, y)
 
     def setZ(self, z):
-        if type(z) == float or type(z) == int:
-            self._coords[0, 2] = float(z)
-        else:
-            raise TypeError("Coordinates must be a float or an int.")
+        self._set(2, z)
 
     def addPoint(self, point):
         # overwrite method in geom